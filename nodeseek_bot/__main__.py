@@ -2,16 +2,11 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
 from pathlib import Path
 
-from dotenv import load_dotenv
-from telegram import Update
-from telegram.ext import Application, ApplicationBuilder
-
 from nodeseek_bot.config import load_config
 from nodeseek_bot.logging_setup import setup_logging
-from nodeseek_bot.jobs.pipeline import build_app_context, start_background_jobs, stop_background_jobs
-from nodeseek_bot.telegram.bot import register_handlers
 
 
 logger = logging.getLogger(__name__)
@@ -29,15 +24,33 @@ def _parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = _parse_args()
-    env_path = Path(args.env)
-    if env_path.exists():
-        load_dotenv(env_path)
-    else:
-        load_dotenv()
+    # Deployments that inject env directly (systemd/docker) don't need .env parsing.
+    if not os.environ.get("BOT_TOKEN"):
+        from dotenv import load_dotenv
+
+        env_path = Path(args.env)
+        if env_path.exists():
+            load_dotenv(env_path)
+        else:
+            load_dotenv()
 
     config = load_config()
     setup_logging(config.log_level, config.log_file)
 
+    # Heavy imports (telegram, httpx, pipeline graph) are deferred until after arg parsing.
+    from telegram import Update
+    from telegram.ext import Application, ApplicationBuilder
+
+    from nodeseek_bot.jobs.pipeline import build_app_context, start_background_jobs, stop_background_jobs
+    from nodeseek_bot.telegram.bot import register_handlers
+
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        uvloop.install()
+
     async def post_init(application: Application) -> None:
         ctx = await build_app_context(config, application)
         application.bot_data["ctx"] = ctx
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import random
 import re
 from dataclasses import dataclass
+from typing import Final
 
 import httpx
+import orjson
 
 from nodeseek_bot.storage.types import SummaryResult
 from nodeseek_bot.utils import truncate
@@ -19,6 +20,27 @@ logger = logging.getLogger(__name__)
 PROMPT_VERSION = "v2-short-zh-longtext"
 PROMPT_IMAGE_VERSION = "v1-image-zh"
 
+_SYSTEM_PROMPT: Final = (
+    "你是一个中文信息提炼助手。请阅读输入的帖子内容，输出严格的 JSON 对象，不要输出任何额外文本。\n"
+    "JSON 字段：\n"
+    "- summary: 1-3 句的超短总结（更短风格）\n"
+    "- key_points: 最多 6 条要点（每条尽量短）\n"
+    "- actions: 最多 4 条可操作建议/结论（没有就空数组）\n"
+    "要求：尽量保留具体信息（价格/期限/关键步骤/结论/风险/可操作建议）。"
+)
+_CHUNK_SYSTEM_PROMPT: Final = (
+    _SYSTEM_PROMPT + "\n你将收到长文的一部分。请只总结这一部分的关键信息，保留数字/期限/步骤/风险。"
+)
+_MERGE_INSTRUCTION: Final = "以下是各片段的提炼结果，请你合并成最终结论，去重、保留具体信息，输出同样的 JSON。\n"
+_IMAGE_SYSTEM_PROMPT: Final = (
+    "你是一个中文图片内容识别与总结助手。\n"
+    "你会收到一组图片（base64 data URL）。请识别图片内容并输出严格的 JSON 对象，不要输出任何额外文本。\n"
+    "JSON 字段：\n"
+    "- image_summaries: 最多 10 条要点，每条描述一张或一类图片的关键信息（尽量短、保留数字/型号/价格/步骤/结论）。\n"
+)
+
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+
 
 @dataclass(frozen=True)
 class AIConfig:
@@ -34,26 +56,43 @@ class AIConfig:
     chunk_overlap_chars: int
 
 
+class _BearerAuth(httpx.Auth):
+    """Bearer auth with the header value encoded once up front."""
+
+    def __init__(self, api_key: str) -> None:
+        self._header = f"Bearer {api_key}".encode("ascii")
+
+    def auth_flow(self, request: httpx.Request):
+        request.headers["Authorization"] = self._header
+        yield request
+
+
 def _extract_json(text: str) -> dict | None:
     text = (text or "").strip()
     if not text:
         return None
     try:
-        data = json.loads(text)
+        data = orjson.loads(text)
         if isinstance(data, dict):
             return data
-    except Exception:
+    except orjson.JSONDecodeError:
         pass
 
+    if "{" not in text:
+        return None
+    # A bare object that failed to parse above won't parse any better via the regex.
+    if text.startswith("{") and text.endswith("}"):
+        return None
+
     # best-effort: extract the first JSON object in the response
-    m = re.search(r"\{[\s\S]*\}", text)
+    m = _JSON_OBJ_RE.search(text)
     if not m:
         return None
     try:
-        data = json.loads(m.group(0))
+        data = orjson.loads(m.group(0))
         if isinstance(data, dict):
             return data
-    except Exception:
+    except orjson.JSONDecodeError:
         return None
     return None
 
@@ -71,9 +110,9 @@ def _normalize_result(model: str, payload: dict, token_in: int | None, token_out
     if isinstance(image_summaries, str):
         image_summaries = [x.strip() for x in image_summaries.split("\n") if x.strip()]
 
-    key_points = [str(x).strip() for x in key_points if str(x).strip()]
-    actions = [str(x).strip() for x in actions if str(x).strip()]
-    image_summaries = [str(x).strip() for x in image_summaries if str(x).strip()]
+    key_points = [s for s in (str(x).strip() for x in key_points) if s]
+    actions = [s for s in (str(x).strip() for x in actions) if s]
+    image_summaries = [s for s in (str(x).strip() for x in image_summaries) if s]
 
     return SummaryResult(
         model=model,
@@ -90,20 +129,28 @@ def _normalize_result(model: str, payload: dict, token_in: int | None, token_out
 class OpenAICompatClient:
     def __init__(self, cfg: AIConfig):
         self._cfg = cfg
+        # Long-lived HTTP/2 pool: chunked summaries multiplex over one connection.
+        # Limits must live on the transport; AsyncClient ignores them once a transport is given.
         self._client = httpx.AsyncClient(
             base_url=cfg.base_url.rstrip("/"),
             timeout=httpx.Timeout(cfg.timeout_seconds),
-            headers={
-                "Authorization": f"Bearer {cfg.api_key}",
-                "Content-Type": "application/json",
-            },
+            http2=True,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60),
+            ),
+            auth=_BearerAuth(cfg.api_key),
+            headers={"Content-Type": "application/json"},
         )
+        # Bounds concurrent chunk summaries of a single long post.
+        self._sem = asyncio.Semaphore(4)
 
     async def aclose(self) -> None:
         await self._client.aclose()
 
     async def _post(self, path: str, payload: dict) -> dict:
-        # Retry on transient network errors and 429/5xx
+        # Retry on transport errors and 429/5xx; connect errors are already retried by the transport.
         attempts = max(0, int(self._cfg.max_retries)) + 1
         last_exc: Exception | None = None
 
@@ -116,15 +163,20 @@ class OpenAICompatClient:
                         request=resp.request,
                         response=resp,
                     )
-                resp.raise_for_status()
-                return resp.json()
-            except (httpx.TransportError, httpx.ReadTimeout, httpx.HTTPStatusError) as e:
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                raise
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
                 last_exc = e
                 if i >= attempts - 1:
                     raise
                 # exponential backoff + jitter
                 base = min(20.0, (2.0**i))
-                await asyncio.sleep(base + random.uniform(0.0, 1.0))
+                await asyncio.sleep(base + random.random())
+                continue
+
+            # Other 4xx are not transient: fail fast without backoff.
+            resp.raise_for_status()
+            return orjson.loads(resp.content)
 
         raise last_exc or RuntimeError("ai request failed")
 
@@ -138,22 +190,13 @@ class OpenAICompatClient:
             }
             return _normalize_result(model="", payload=payload, token_in=None, token_out=None)
 
-        system = (
-            "你是一个中文信息提炼助手。请阅读输入的帖子内容，输出严格的 JSON 对象，不要输出任何额外文本。\n"
-            "JSON 字段：\n"
-            "- summary: 1-3 句的超短总结（更短风格）\n"
-            "- key_points: 最多 6 条要点（每条尽量短）\n"
-            "- actions: 最多 4 条可操作建议/结论（没有就空数组）\n"
-            "要求：尽量保留具体信息（价格/期限/关键步骤/结论/风险/可操作建议）。"
-        )
-
         # Long-text handling: keep as much as possible, only chunk when necessary.
         max_chars = max(1000, int(self._cfg.max_input_chars or 0))
         if len(text) > max_chars:
-            return await self._summarize_long_text(system, title, url, text)
+            return await self._summarize_long_text(title, url, text)
 
         user = f"标题：{title}\n链接：{url}\n内容：\n{text}"
-        return await self._summarize_once(system, user)
+        return await self._summarize_once(_SYSTEM_PROMPT, user)
 
     async def summarize_images(self, title: str, url: str, image_data_urls: list[str]) -> list[str]:
         """Summarize images (data URLs) and return bullet-like lines.
@@ -167,13 +210,6 @@ class OpenAICompatClient:
         if not images:
             return []
 
-        system = (
-            "你是一个中文图片内容识别与总结助手。\n"
-            "你会收到一组图片（base64 data URL）。请识别图片内容并输出严格的 JSON 对象，不要输出任何额外文本。\n"
-            "JSON 字段：\n"
-            "- image_summaries: 最多 10 条要点，每条描述一张或一类图片的关键信息（尽量短、保留数字/型号/价格/步骤/结论）。\n"
-        )
-
         content_parts: list[dict] = [
             {
                 "type": "text",
@@ -186,18 +222,18 @@ class OpenAICompatClient:
         payload = {
             "model": self._cfg.model,
             "messages": [
-                {"role": "system", "content": system},
+                {"role": "system", "content": _IMAGE_SYSTEM_PROMPT},
                 {"role": "user", "content": content_parts},
             ],
             "temperature": 0.2,
             "max_tokens": 700,
+            "response_format": {"type": "json_object"},
         }
 
         try:
-            payload_with_format = dict(payload)
-            payload_with_format["response_format"] = {"type": "json_object"}
-            data = await self._post("/v1/chat/completions", payload_with_format)
+            data = await self._post("/v1/chat/completions", payload)
         except httpx.HTTPStatusError:
+            payload.pop("response_format", None)
             data = await self._post("/v1/chat/completions", payload)
 
         content = (
@@ -210,7 +246,7 @@ class OpenAICompatClient:
         items = payload_obj.get("image_summaries") or payload_obj.get("images") or []
         if isinstance(items, str):
             items = [x.strip() for x in items.split("\n") if x.strip()]
-        return [str(x).strip() for x in (items or []) if str(x).strip()][:10]
+        return [s for s in (str(x).strip() for x in (items or [])) if s][:10]
 
     async def _summarize_once(self, system: str, user: str) -> SummaryResult:
         if self._cfg.prefer_chat_completions:
@@ -227,33 +263,40 @@ class OpenAICompatClient:
         chunk_chars = max(2000, int(self._cfg.chunk_chars or 0))
         overlap = max(0, min(chunk_chars - 1, int(self._cfg.chunk_overlap_chars or 0)))
 
-        chunks: list[str] = []
-        start = 0
         n = len(text)
-        while start < n:
-            end = min(n, start + chunk_chars)
+        if n <= chunk_chars:
+            return [text]
+
+        chunks: list[str] = []
+        for start in range(0, n, chunk_chars - overlap):
+            end = start + chunk_chars
             chunks.append(text[start:end])
             if end >= n:
                 break
-            start = max(0, end - overlap)
         return chunks
 
-    async def _summarize_long_text(self, system: str, title: str, url: str, text: str) -> SummaryResult:
+    async def _summarize_long_text(self, title: str, url: str, text: str) -> SummaryResult:
         chunks = self._chunk_text(text)
         logger.info("ai long text: %s chars split into %s chunks", len(text), len(chunks))
 
-        partials: list[SummaryResult] = []
-        for idx, chunk in enumerate(chunks, start=1):
-            chunk_system = (
-                system
-                + "\n你将收到长文的一部分。请只总结这一部分的关键信息，保留数字/期限/步骤/风险。"
-            )
+        async def _bounded(idx: int, chunk: str) -> SummaryResult:
             user = (
                 f"标题：{title}\n链接：{url}\n"
                 f"片段：{idx}/{len(chunks)}\n"
                 f"内容：\n{chunk}"
             )
-            partials.append(await self._summarize_once(chunk_system, user))
+            async with self._sem:
+                return await self._summarize_once(_CHUNK_SYSTEM_PROMPT, user)
+
+        # Chunks are independent until the merge; gather keeps them in order.
+        tasks = [asyncio.create_task(_bounded(idx, chunk)) for idx, chunk in enumerate(chunks, start=1)]
+        try:
+            partials: list[SummaryResult] = await asyncio.gather(*tasks)
+        except BaseException:
+            # gather leaves the other chunks running; stop them from spending quota on a failed summary.
+            for t in tasks:
+                t.cancel()
+            raise
 
         merged_lines: list[str] = []
         for i, p in enumerate(partials, start=1):
@@ -265,10 +308,10 @@ class OpenAICompatClient:
 
         merge_user = (
             f"标题：{title}\n链接：{url}\n"
-            "以下是各片段的提炼结果，请你合并成最终结论，去重、保留具体信息，输出同样的 JSON。\n"
+            + _MERGE_INSTRUCTION
             + "\n".join(merged_lines)
         )
-        return await self._summarize_once(system, merge_user)
+        return await self._summarize_once(_SYSTEM_PROMPT, merge_user)
 
     async def _summarize_chat(self, system: str, user: str) -> SummaryResult:
         payload = {
@@ -279,14 +322,14 @@ class OpenAICompatClient:
             ],
             "temperature": 0.2,
             "max_tokens": 700,
+            # Some providers support response_format, but not all.
+            "response_format": {"type": "json_object"},
         }
 
-        # Some providers support response_format, but not all.
         try:
-            payload_with_format = dict(payload)
-            payload_with_format["response_format"] = {"type": "json_object"}
-            data = await self._post("/v1/chat/completions", payload_with_format)
+            data = await self._post("/v1/chat/completions", payload)
         except httpx.HTTPStatusError:
+            payload.pop("response_format", None)
             data = await self._post("/v1/chat/completions", payload)
 
         content = (
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Callable
 import os
 
 
+_TRUTHY: frozenset[str] = frozenset({"1", "true", "yes", "y", "on"})
+
+
 def _env_str(name: str, default: str | None = None) -> str:
     value = os.getenv(name)
     if value is None:
@@ -23,12 +28,16 @@ def _env_int(name: str, default: int | None = None) -> int:
     return int(value)
 
 
+def _env_path(name: str, default: str | None = None) -> Path:
+    return Path(_env_str(name, default))
+
+
 def _env_bool(name: str, default: bool = False) -> bool:
     value = os.getenv(name)
     if value is None:
         return default
     value = value.strip().lower()
-    return value in {"1", "true", "yes", "y", "on"}
+    return value in _TRUTHY
 
 
 @dataclass(frozen=True)
@@ -61,6 +70,8 @@ class Config:
     nodeseek_html_jitter_seconds: int
     nodeseek_http_timeout_seconds: int
     nodeseek_max_retries: int
+    nodeseek_http_max_connections: int
+    nodeseek_http_backend: str
     stop_fulltext_on_antibot: bool
     login_backoff_seconds: int
     fulltext_near_threshold_delta: int
@@ -117,68 +128,76 @@ class Config:
     log_file: str
 
 
+# (field, reader, default); each field is read from the env var of the same name upper-cased.
+_FIELDS: tuple[tuple[str, Callable[..., Any], Any], ...] = (
+    ("bot_token", _env_str, None),
+    ("target_chat_id", _env_int, -1003697568105),
+    ("admin_user_id", _env_int, 1443986987),
+    ("alert_chat_id", _env_int, 1443986987),
+    ("tg_parse_mode", _env_str, "HTML"),
+    ("image_summary_enabled", _env_bool, True),
+    ("image_max_count", _env_int, 10),
+    ("image_max_bytes", _env_int, 1500000),
+    ("image_total_max_bytes", _env_int, 8000000),
+    ("image_download_timeout_seconds", _env_int, 20),
+    ("image_concurrency", _env_int, 3),
+    ("image_cookie_host_suffixes", _env_str, "nodeseek.com"),
+    ("rss_url", _env_str, "https://rss.nodeseek.com/"),
+    ("rss_interval_seconds", _env_int, 60),
+    ("rss_jitter_seconds", _env_int, 10),
+    ("fulltext_enabled", _env_bool, True),
+    ("nodeseek_cookie", _env_str, ""),
+    ("nodeseek_html_min_interval_seconds", _env_int, 60),
+    ("nodeseek_html_jitter_seconds", _env_int, 15),
+    ("nodeseek_http_timeout_seconds", _env_int, 30),
+    ("nodeseek_max_retries", _env_int, 2),
+    ("nodeseek_http_max_connections", _env_int, 100),
+    ("nodeseek_http_backend", _env_str, "httpx"),
+    ("stop_fulltext_on_antibot", _env_bool, True),
+    ("login_backoff_seconds", _env_int, 3600),
+    ("fulltext_near_threshold_delta", _env_int, 4),
+    ("fulltext_fetch_policy", _env_str, "near_threshold"),
+    (
+        "user_agent",
+        _env_str,
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    ),
+    ("allow_browser_fallback", _env_bool, True),
+    ("playwright_headless", _env_bool, True),
+    ("playwright_nav_timeout_seconds", _env_int, 45),
+    ("rich_text_enabled", _env_bool, True),
+    ("rich_text_max_chars", _env_int, 20000),
+    ("rich_text_max_code_blocks", _env_int, 6),
+    ("rich_text_max_code_chars_total", _env_int, 6000),
+    ("rich_text_max_table_rows", _env_int, 30),
+    ("rich_text_max_links", _env_int, 40),
+    ("ai_base_url", _env_str, ""),
+    ("ai_api_key", _env_str, ""),
+    ("ai_model", _env_str, ""),
+    ("ai_timeout_seconds", _env_int, 180),
+    ("ai_max_retries", _env_int, 2),
+    ("ai_prefer_chat_completions", _env_bool, True),
+    ("ai_fallback_to_responses", _env_bool, True),
+    ("ai_max_input_chars", _env_int, 200000),
+    ("ai_chunk_chars", _env_int, 60000),
+    ("ai_chunk_overlap_chars", _env_int, 1500),
+    ("rules_path", _env_path, "rules/rules.yaml"),
+    ("rules_overrides_path", _env_path, "rules/overrides.yaml"),
+    ("sqlite_path", _env_path, "data/nodeseek.db"),
+    ("data_retention_days", _env_int, 7),
+    ("fingerprint_retention_days", _env_int, 3650),
+    ("metrics_enabled", _env_bool, True),
+    ("metrics_bind", _env_str, "127.0.0.1"),
+    ("metrics_port", _env_int, 9108),
+    ("status_json_path", _env_path, "data/status.json"),
+    ("alert_n_fetch", _env_int, 5),
+    ("alert_n_login", _env_int, 3),
+    ("alert_n_ai", _env_int, 5),
+    ("log_level", _env_str, "INFO"),
+    ("log_file", _env_str, ""),
+)
+
+
+@lru_cache(maxsize=1)
 def load_config() -> Config:
-    return Config(
-        bot_token=_env_str("BOT_TOKEN"),
-        target_chat_id=_env_int("TARGET_CHAT_ID", -1003697568105),
-        admin_user_id=_env_int("ADMIN_USER_ID", 1443986987),
-        alert_chat_id=_env_int("ALERT_CHAT_ID", 1443986987),
-        tg_parse_mode=_env_str("TG_PARSE_MODE", "HTML"),
-        image_summary_enabled=_env_bool("IMAGE_SUMMARY_ENABLED", True),
-        image_max_count=_env_int("IMAGE_MAX_COUNT", 10),
-        image_max_bytes=_env_int("IMAGE_MAX_BYTES", 1500000),
-        image_total_max_bytes=_env_int("IMAGE_TOTAL_MAX_BYTES", 8000000),
-        image_download_timeout_seconds=_env_int("IMAGE_DOWNLOAD_TIMEOUT_SECONDS", 20),
-        image_concurrency=_env_int("IMAGE_CONCURRENCY", 3),
-        image_cookie_host_suffixes=_env_str("IMAGE_COOKIE_HOST_SUFFIXES", "nodeseek.com"),
-        rss_url=_env_str("RSS_URL", "https://rss.nodeseek.com/"),
-        rss_interval_seconds=_env_int("RSS_INTERVAL_SECONDS", 60),
-        rss_jitter_seconds=_env_int("RSS_JITTER_SECONDS", 10),
-        fulltext_enabled=_env_bool("FULLTEXT_ENABLED", True),
-        nodeseek_cookie=_env_str("NODESEEK_COOKIE", ""),
-        nodeseek_html_min_interval_seconds=_env_int("NODESEEK_HTML_MIN_INTERVAL_SECONDS", 60),
-        nodeseek_html_jitter_seconds=_env_int("NODESEEK_HTML_JITTER_SECONDS", 15),
-        nodeseek_http_timeout_seconds=_env_int("NODESEEK_HTTP_TIMEOUT_SECONDS", 30),
-        nodeseek_max_retries=_env_int("NODESEEK_MAX_RETRIES", 2),
-        stop_fulltext_on_antibot=_env_bool("STOP_FULLTEXT_ON_ANTIBOT", True),
-        login_backoff_seconds=_env_int("LOGIN_BACKOFF_SECONDS", 3600),
-        fulltext_near_threshold_delta=_env_int("FULLTEXT_NEAR_THRESHOLD_DELTA", 4),
-        fulltext_fetch_policy=_env_str("FULLTEXT_FETCH_POLICY", "near_threshold"),
-        user_agent=_env_str(
-            "USER_AGENT",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
-        ),
-        allow_browser_fallback=_env_bool("ALLOW_BROWSER_FALLBACK", True),
-        playwright_headless=_env_bool("PLAYWRIGHT_HEADLESS", True),
-        playwright_nav_timeout_seconds=_env_int("PLAYWRIGHT_NAV_TIMEOUT_SECONDS", 45),
-        rich_text_enabled=_env_bool("RICH_TEXT_ENABLED", True),
-        rich_text_max_chars=_env_int("RICH_TEXT_MAX_CHARS", 20000),
-        rich_text_max_code_blocks=_env_int("RICH_TEXT_MAX_CODE_BLOCKS", 6),
-        rich_text_max_code_chars_total=_env_int("RICH_TEXT_MAX_CODE_CHARS_TOTAL", 6000),
-        rich_text_max_table_rows=_env_int("RICH_TEXT_MAX_TABLE_ROWS", 30),
-        rich_text_max_links=_env_int("RICH_TEXT_MAX_LINKS", 40),
-        ai_base_url=_env_str("AI_BASE_URL", ""),
-        ai_api_key=_env_str("AI_API_KEY", ""),
-        ai_model=_env_str("AI_MODEL", ""),
-        ai_timeout_seconds=_env_int("AI_TIMEOUT_SECONDS", 180),
-        ai_max_retries=_env_int("AI_MAX_RETRIES", 2),
-        ai_prefer_chat_completions=_env_bool("AI_PREFER_CHAT_COMPLETIONS", True),
-        ai_fallback_to_responses=_env_bool("AI_FALLBACK_TO_RESPONSES", True),
-        ai_max_input_chars=_env_int("AI_MAX_INPUT_CHARS", 200000),
-        ai_chunk_chars=_env_int("AI_CHUNK_CHARS", 60000),
-        ai_chunk_overlap_chars=_env_int("AI_CHUNK_OVERLAP_CHARS", 1500),
-        rules_path=Path(_env_str("RULES_PATH", "rules/rules.yaml")),
-        rules_overrides_path=Path(_env_str("RULES_OVERRIDES_PATH", "rules/overrides.yaml")),
-        sqlite_path=Path(_env_str("SQLITE_PATH", "data/nodeseek.db")),
-        data_retention_days=_env_int("DATA_RETENTION_DAYS", 7),
-        fingerprint_retention_days=_env_int("FINGERPRINT_RETENTION_DAYS", 3650),
-        metrics_enabled=_env_bool("METRICS_ENABLED", True),
-        metrics_bind=_env_str("METRICS_BIND", "127.0.0.1"),
-        metrics_port=_env_int("METRICS_PORT", 9108),
-        status_json_path=Path(_env_str("STATUS_JSON_PATH", "data/status.json")),
-        alert_n_fetch=_env_int("ALERT_N_FETCH", 5),
-        alert_n_login=_env_int("ALERT_N_LOGIN", 3),
-        alert_n_ai=_env_int("ALERT_N_AI", 5),
-        log_level=_env_str("LOG_LEVEL", "INFO"),
-        log_file=_env_str("LOG_FILE", ""),
-    )
+    return Config(**{name: reader(name.upper(), default) for name, reader, default in _FIELDS})
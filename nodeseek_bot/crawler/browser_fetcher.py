@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
+from pathlib import Path
 
 from nodeseek_bot.crawler.errors import FetchError, ERROR_ANTIBOT, ERROR_LOGIN_REQUIRED, ERROR_TIMEOUT, ERROR_UNKNOWN
 from nodeseek_bot.crawler.parser import (
-    detect_antibot,
-    detect_login_required,
+    classify_page,
     extract_image_urls_from_html,
     extract_main_text,
 )
@@ -26,24 +27,29 @@ class PlaywrightPostFetcher:
         cookie_header: str,
         headless: bool,
         nav_timeout_seconds: int,
+        user_agent: str | None = None,
+        user_data_dir: Path | None = None,
     ) -> None:
         self._limiter = limiter
         self._cookie_header = cookie_header
         self._headless = headless
         self._nav_timeout_ms = int(nav_timeout_seconds * 1000)
+        self._user_agent = user_agent
+        self._user_data_dir = user_data_dir or Path("data/pw-profile")
         self._playwright = None
-        self._browser = None
+        self._context = None
 
     async def aclose(self) -> None:
-        if self._browser is not None:
-            await self._browser.close()
-            self._browser = None
+        if self._context is not None:
+            # Closing a persistent context also shuts down its browser.
+            await self._context.close()
+            self._context = None
         if self._playwright is not None:
             await self._playwright.stop()
             self._playwright = None
 
     async def _ensure_browser(self) -> None:
-        if self._browser is not None:
+        if self._context is not None:
             return
         try:
             from playwright.async_api import async_playwright
@@ -53,7 +59,22 @@ class PlaywrightPostFetcher:
             ) from e
 
         self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(headless=self._headless)
+
+        # One persistent context for all fetches: cookies, HTTP cache and V8 code cache are
+        # shared across pages and survive restarts, so warm starts skip most of the setup cost.
+        self._user_data_dir.mkdir(parents=True, exist_ok=True)
+        self._context = await self._playwright.chromium.launch_persistent_context(
+            user_data_dir=self._user_data_dir.as_posix(),
+            headless=self._headless,
+            args=["--disable-dev-shm-usage", "--disable-gpu"],
+            extra_http_headers={"Cookie": self._cookie_header},
+            user_agent=self._user_agent,
+        )
+        # Only the DOM is needed; skip images/fonts/styles.
+        await self._context.route(
+            "**/*.{png,jpg,jpeg,gif,webp,svg,ico,woff,woff2,ttf,css}",
+            lambda route: route.abort(),
+        )
 
     async def fetch(self, url: str) -> tuple[ContentResult, dict]:
         await self._limiter.acquire()
@@ -62,8 +83,7 @@ class PlaywrightPostFetcher:
         started = time.perf_counter()
         method_meta: dict = {"method": "BROWSER", "http_status": None}
 
-        page = await self._browser.new_page()
-        await page.set_extra_http_headers({"Cookie": self._cookie_header})
+        page = await self._context.new_page()
 
         try:
             await page.goto(url, timeout=self._nav_timeout_ms, wait_until="domcontentloaded")
@@ -77,15 +97,24 @@ class PlaywrightPostFetcher:
 
         await page.close()
 
-        if detect_antibot(html):
+        # Parsing is CPU-bound; keep the event loop free for Telegram polling and other I/O.
+        result = await asyncio.to_thread(self._process_html, html, url)
+
+        method_meta["duration_ms"] = int((time.perf_counter() - started) * 1000)
+        return result, method_meta
+
+    @staticmethod
+    def _process_html(html: str, url: str) -> ContentResult:
+        kind = classify_page(html)
+        if kind == "antibot":
             raise FetchError(ERROR_ANTIBOT, "antibot/challenge detected")
-        if detect_login_required(html):
+        if kind == "login":
             raise FetchError(ERROR_LOGIN_REQUIRED, "login required")
 
         text = collapse_ws(extract_main_text(html))
         content_html = html
         image_urls = extract_image_urls_from_html(html, base_url=url)
-        result = ContentResult(
+        return ContentResult(
             content_text=text,
             content_html=content_html,
             content_hash=sha256_hex(text) if text else None,
@@ -94,6 +123,3 @@ class PlaywrightPostFetcher:
             source_confidence=CONF_FULLTEXT_BROWSER,
             image_urls=image_urls,
         )
-
-        method_meta["duration_ms"] = int((time.perf_counter() - started) * 1000)
-        return result, method_meta
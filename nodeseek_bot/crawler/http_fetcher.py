@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import random
 import time
+from email.utils import parsedate_to_datetime
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
 
 from nodeseek_bot.crawler.errors import (
     FetchError,
@@ -15,7 +17,7 @@ from nodeseek_bot.crawler.errors import (
     ERROR_UNKNOWN,
 )
 from nodeseek_bot.crawler.parser import (
-    detect_antibot,
+    detect_antibot_bytes,
     detect_login_required,
     extract_image_urls_from_html,
     extract_main_text,
@@ -36,6 +38,38 @@ def _redact_detail(detail: str) -> str:
     return detail
 
 
+_MAX_RETRY_AFTER_SECONDS = 3600.0
+
+
+def _retry_after_seconds(value: str | None) -> float:
+    # Retry-After is either delta-seconds or an HTTP-date.
+    if not value:
+        return 0.0
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return 0.0
+    return min(max(0.0, seconds), _MAX_RETRY_AFTER_SECONDS)
+
+
+def _aiohttp_transport(max_connections: int) -> httpx.AsyncBaseTransport | None:
+    try:
+        import aiohttp
+        from httpx_aiohttp import AiohttpTransport
+    except ImportError:
+        logger.warning("NODESEEK_HTTP_BACKEND=aiohttp 但未安装 httpx-aiohttp，回退到 httpx 默认连接池")
+        return None
+    return AiohttpTransport(
+        client=lambda: aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=30.0)
+        )
+    )
+
+
 class HttpPostFetcher:
     def __init__(
         self,
@@ -44,6 +78,8 @@ class HttpPostFetcher:
         timeout_seconds: int,
         max_retries: int,
         user_agent: str,
+        max_connections: int = 100,
+        backend: str = "httpx",
     ) -> None:
         self._limiter = limiter
         self._cookie_header = cookie_header
@@ -51,9 +87,18 @@ class HttpPostFetcher:
         self._max_retries = max_retries
         self._user_agent = user_agent
 
+        max_connections = max(1, int(max_connections))
+        transport = _aiohttp_transport(max_connections) if backend.strip().lower() == "aiohttp" else None
         self._client = httpx.AsyncClient(
             follow_redirects=True,
             timeout=httpx.Timeout(timeout_seconds),
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+            transport=transport,
             headers={
                 "User-Agent": user_agent,
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -64,14 +109,17 @@ class HttpPostFetcher:
     async def aclose(self) -> None:
         await self._client.aclose()
 
-    @retry(
-        retry=retry_if_exception_type((httpx.TransportError, httpx.ReadTimeout)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential_jitter(initial=1, max=10),
-        reraise=True,
-    )
     async def _get(self, url: str) -> httpx.Response:
-        return await self._client.get(url)
+        # Retry transient network errors with exponential backoff + jitter.
+        attempts = max(0, int(self._max_retries)) + 1
+        for attempt in range(attempts):
+            try:
+                return await self._client.get(url)
+            except (httpx.TransportError, httpx.ReadTimeout):
+                if attempt >= attempts - 1:
+                    raise
+                await asyncio.sleep(min(10.0, (1 << attempt) + random.random()))
+        raise RuntimeError("http get failed")
 
     async def fetch(self, url: str) -> tuple[ContentResult, dict]:
         await self._limiter.acquire()
@@ -88,18 +136,34 @@ class HttpPostFetcher:
         except Exception as e:  # pragma: no cover
             raise FetchError(ERROR_UNKNOWN, _redact_detail(str(e))) from e
 
-        if resp.status_code == 429:
-            raise FetchError(ERROR_HTTP, "429 too many requests")
-        if resp.status_code >= 500:
-            raise FetchError(ERROR_HTTP, f"{resp.status_code} server error")
-        if resp.status_code >= 400:
-            raise FetchError(ERROR_HTTP, f"{resp.status_code} client error")
+        code = resp.status_code
+        if code >= 400:
+            if code in (429, 503):
+                # Let the shared limiter honour the server's back-off for every later fetch.
+                self._limiter.defer(_retry_after_seconds(resp.headers.get("Retry-After")))
+            if code == 429:
+                raise FetchError(ERROR_HTTP, "429 too many requests")
+            raise FetchError(ERROR_HTTP, f"{code} {'server' if code >= 500 else 'client'} error")
+
+        # Decoding, parsing and hashing are CPU-bound; run them off the event loop.
+        result = await asyncio.to_thread(
+            self._process_html, resp.content, resp.charset_encoding or "utf-8", url
+        )
 
-        html = resp.text
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        method_meta["duration_ms"] = duration_ms
+        return result, method_meta
 
-        if detect_antibot(html):
+    @staticmethod
+    def _process_html(raw: bytes, encoding: str, url: str) -> ContentResult:
+        if detect_antibot_bytes(raw):
             raise FetchError(ERROR_ANTIBOT, "antibot/challenge detected")
 
+        try:
+            html = raw.decode(encoding, errors="replace")
+        except LookupError:
+            html = raw.decode("utf-8", errors="replace")
+
         if detect_login_required(html):
             raise FetchError(ERROR_LOGIN_REQUIRED, "login required")
 
@@ -115,10 +179,7 @@ class HttpPostFetcher:
         content_len = len(text)
         fetched_at = now_utc()
 
-        duration_ms = int((time.perf_counter() - started) * 1000)
-        method_meta["duration_ms"] = duration_ms
-
-        result = ContentResult(
+        return ContentResult(
             content_text=text,
             content_html=content_html,
             content_hash=content_hash,
@@ -127,4 +188,3 @@ class HttpPostFetcher:
             source_confidence=CONF_FULLTEXT_HTTP,
             image_urls=image_urls,
         )
-        return result, method_meta
@@ -3,31 +3,51 @@ from __future__ import annotations
 import re
 from urllib.parse import urljoin
 
-from selectolax.parser import HTMLParser
+try:
+    # Lexbor is faster and lighter than the Modest backend on large pages.
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # pragma: no cover - selectolax built without Lexbor
+    from selectolax.parser import HTMLParser
 
 from nodeseek_bot.utils import collapse_ws
 
 
-_LOGIN_HINTS = [
+_LOGIN_HINTS = (
     "登录",
     "需要登录",
     "请登录",
     "需要权限",
-]
+)
 
-_ANTIBOT_HINTS = [
+_ANTIBOT_HINTS = (
     "cf_clearance",
     "Cloudflare",
     "Just a moment",
     "captcha",
     "challenge",
-]
+)
+
+
+_ANTIBOT_RE = re.compile("|".join(re.escape(h) for h in _ANTIBOT_HINTS), re.IGNORECASE)
+_LOGIN_RE = re.compile("|".join(re.escape(h) for h in _LOGIN_HINTS), re.IGNORECASE)
+# Both hint sets in one alternation; antibot alternatives come first so they win ties.
+_HINT_RE = re.compile(
+    "(?P<antibot>" + _ANTIBOT_RE.pattern + ")|(?P<login>" + _LOGIN_RE.pattern + ")",
+    re.IGNORECASE,
+)
+# Antibot hints are ASCII, so they can be matched on the raw body before decoding.
+_ANTIBOT_BYTES_RE = re.compile(b"|".join(re.escape(h.encode("ascii")) for h in _ANTIBOT_HINTS), re.IGNORECASE)
 
 
 _MD_IMAGE_RE = re.compile(
-    r"!\[[^\]]*\]\((?P<url>[^\)\s]+)(?:\s+\"[^\"]*\")?\)",
+    r"!\[[^\]]*\]\(([^\)\s]+)(?:\s+\"[^\"]*\")?\)",
     flags=re.IGNORECASE,
 )
+_IMG_TAG_RE = re.compile(r"<img\b", re.IGNORECASE)
+
+# A container with at least this much text is taken as the main content without
+# looking at the remaining candidates.
+_DECISIVE_MAIN_TEXT_CHARS = 2000
 
 
 def extract_image_urls_from_markdown(markdown: str, base_url: str = "") -> list[str]:
@@ -35,29 +55,24 @@ def extract_image_urls_from_markdown(markdown: str, base_url: str = "") -> list[
     if not markdown:
         return urls
 
-    for m in _MD_IMAGE_RE.finditer(markdown):
-        u = (m.group("url") or "").strip()
-        if not u:
-            continue
-        if base_url:
-            u = urljoin(base_url, u)
-        urls.append(u)
+    if "![" in markdown:
+        for m in _MD_IMAGE_RE.finditer(markdown):
+            u = (m.group(1) or "").strip()
+            if not u:
+                continue
+            if base_url:
+                u = urljoin(base_url, u)
+            urls.append(u)
 
-    # Also handle inline HTML <img> within markdown.
-    urls.extend(extract_image_urls_from_html(markdown, base_url=base_url))
+    # Also handle inline HTML <img> within markdown (skip the HTML parse when there is none).
+    if _IMG_TAG_RE.search(markdown):
+        urls.extend(extract_image_urls_from_html(markdown, base_url=base_url))
 
     # Dedup keep order
-    seen: set[str] = set()
-    out: list[str] = []
-    for u in urls:
-        if u in seen:
-            continue
-        seen.add(u)
-        out.append(u)
-    return out
+    return list(dict.fromkeys(urls))
 
 
-def _extract_urls_from_srcset(srcset: str, base_url: str) -> list[str]:
+def _extract_urls_from_srcset(srcset: str) -> list[str]:
     urls: list[str] = []
     for part in (srcset or "").split(","):
         item = part.strip()
@@ -65,11 +80,8 @@ def _extract_urls_from_srcset(srcset: str, base_url: str) -> list[str]:
             continue
         # "url 2x" or "url 480w"
         u = item.split()[0].strip()
-        if not u:
-            continue
-        if base_url:
-            u = urljoin(base_url, u)
-        urls.append(u)
+        if u:
+            urls.append(u)
     return urls
 
 
@@ -79,6 +91,8 @@ def extract_image_urls_from_html(html: str, base_url: str = "") -> list[str]:
 
     tree = HTMLParser(html)
 
+    # src/data-src/srcset often repeat the same URL; join each distinct one once.
+    joined: dict[str, str] = {}
     urls: list[str] = []
     for img in tree.css("img"):
         src = (img.attributes.get("src") or "").strip()
@@ -91,60 +105,71 @@ def extract_image_urls_from_html(html: str, base_url: str = "") -> list[str]:
         if data_src:
             candidates.append(data_src)
         if srcset:
-            candidates.extend(_extract_urls_from_srcset(srcset, base_url))
+            candidates.extend(_extract_urls_from_srcset(srcset))
 
         for u in candidates:
             if not u:
                 continue
             if base_url:
-                u = urljoin(base_url, u)
+                j = joined.get(u)
+                if j is None:
+                    j = joined[u] = urljoin(base_url, u)
+                u = j
             urls.append(u)
 
     # Dedup keep order
-    seen: set[str] = set()
-    out: list[str] = []
-    for u in urls:
-        if u in seen:
-            continue
-        seen.add(u)
-        out.append(u)
-    return out
+    return list(dict.fromkeys(urls))
 
 
 def detect_antibot(html: str) -> bool:
-    hay = html.lower()
-    return any(h.lower() in hay for h in _ANTIBOT_HINTS)
+    return _ANTIBOT_RE.search(html) is not None
+
+
+def detect_antibot_bytes(raw: bytes) -> bool:
+    return _ANTIBOT_BYTES_RE.search(raw) is not None
 
 
 def detect_login_required(html: str) -> bool:
-    hay = html.lower()
-    return any(h.lower() in hay for h in _LOGIN_HINTS)
+    # Login hints are CJK: no case to fold, plain substring checks suffice.
+    return any(h in html for h in _LOGIN_HINTS)
+
+
+def classify_page(html: str) -> str | None:
+    """Return "antibot", "login" or None from one scan over the page.
+
+    Antibot takes precedence like the separate detectors: after a login hit, only the
+    remainder of the page is searched for an antibot hint.
+    """
+    m = _HINT_RE.search(html)
+    if m is None:
+        return None
+    if m.lastgroup == "antibot" or _ANTIBOT_RE.search(html, m.start() + 1) is not None:
+        return "antibot"
+    return "login"
 
 
 def extract_main_text(html: str) -> str:
     tree = HTMLParser(html)
 
     # Remove some noise
-    for node in tree.css("script, style, noscript"):
-        node.decompose()
-
-    # Try common containers first
-    candidates = []
-    for selector in [
-        "article",
-        ".post-content",
-        ".topic-content",
-        ".markdown-body",
-        "main",
-    ]:
-        for n in tree.css(selector):
-            text = n.text(separator="\n")
-            text = collapse_ws(text)
-            if len(text) >= 80:
-                candidates.append(text)
-
-    if candidates:
-        return max(candidates, key=len)
+    tree.strip_tags(["script", "style", "noscript"])
+
+    # Try common containers first (one traversal for all selectors), keep the longest.
+    best_text = ""
+    for n in tree.css("article, .post-content, .topic-content, .markdown-body, main"):
+        raw = n.text(separator="\n")
+        # Collapsing only shrinks text: skip nodes that can't qualify or beat the best so far.
+        if len(raw) < 80 or len(raw) <= len(best_text):
+            continue
+        text = collapse_ws(raw)
+        if len(text) >= _DECISIVE_MAIN_TEXT_CHARS:
+            # Clearly the post body; outer containers come first in document order.
+            return text
+        if len(text) >= 80 and len(text) > len(best_text):
+            best_text = text
+
+    if best_text:
+        return best_text
 
     text = collapse_ws(tree.text(separator="\n"))
     return text
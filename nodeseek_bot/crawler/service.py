@@ -14,25 +14,20 @@ logger = logging.getLogger(__name__)
 
 class FulltextDisabledState:
     def __init__(self) -> None:
-        self._disabled_until_ts: float | None = None
-        self._disabled_forever: bool = False
+        # 0.0 = enabled, inf = disabled until manually re-enabled.
+        self._disabled_until_ts: float = 0.0
 
     def disable_for_seconds(self, seconds: int) -> None:
-        self._disabled_forever = False
         self._disabled_until_ts = time.time() + max(0, seconds)
 
     def disable_forever(self) -> None:
-        self._disabled_forever = True
-        self._disabled_until_ts = None
+        self._disabled_until_ts = float("inf")
 
     def enable(self) -> None:
-        self._disabled_forever = False
-        self._disabled_until_ts = None
+        self._disabled_until_ts = 0.0
 
     def is_disabled(self) -> bool:
-        if self._disabled_forever:
-            return True
-        return self._disabled_until_ts is not None and time.time() < self._disabled_until_ts
+        return time.time() < self._disabled_until_ts
 
 
 class CrawlerService:
@@ -4,7 +4,10 @@ import asyncio
 import logging
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from collections.abc import Sequence
+from itertools import groupby
+from operator import itemgetter
 
 from telegram.ext import Application
 
@@ -14,15 +17,16 @@ from nodeseek_bot.crawler.errors import ERROR_LOGIN_REQUIRED
 from nodeseek_bot.crawler.browser_fetcher import PlaywrightPostFetcher
 from nodeseek_bot.crawler.http_fetcher import HttpPostFetcher
 from nodeseek_bot.crawler.service import CrawlerService
-from nodeseek_bot.media.images import download_images_as_data_urls
+from nodeseek_bot.jobs.scheduler import AsyncScheduler
+from nodeseek_bot.media.images import aclose_image_client, download_images_as_data_urls
 from nodeseek_bot.metrics.metrics import Metrics, RuntimeStats, write_status_json
 from nodeseek_bot.ratelimit import MinIntervalLimiter
 from nodeseek_bot.rss.async_poller import AsyncRssPoller
 from nodeseek_bot.rules.engine import RuleEngine
-from nodeseek_bot.rules.loader import load_rules
-from nodeseek_bot.storage.db import Storage, STATUS_FAILED, STATUS_IGNORED
-from nodeseek_bot.storage.types import SummaryResult
-from nodeseek_bot.telegram.alerts import maybe_send_consecutive_failure_alert
+from nodeseek_bot.rules.loader import load_rules, load_yaml, save_overrides
+from nodeseek_bot.storage.db import CONF_RSS_ONLY, Storage, STATUS_FAILED, STATUS_IGNORED
+from nodeseek_bot.storage.types import FeedItem, FetchAttempt, ScoreResult, SummaryResult
+from nodeseek_bot.telegram.alerts import maybe_send_consecutive_failure_alert, send_alert
 from nodeseek_bot.telegram.bot import build_inline_keyboard
 from nodeseek_bot.telegram.render import render_message
 from nodeseek_bot.utils import collapse_ws
@@ -31,6 +35,12 @@ from nodeseek_bot.markdown.html_rich import RichTextConfig, html_to_rich_text
 
 
 _MIN_LABELS_TO_AUTOFILTER = 10000
+_RSS_UPSERT_BATCH = 500
+# Quiet period after the last admin rules edit before the overrides file is written and rules rebuilt.
+_OVERRIDES_FLUSH_DELAY_SECONDS = 0.5
+# Backoff between retries of a failed overrides save: 5s, 10s, 20s, ... capped.
+_OVERRIDES_RETRY_BASE_SECONDS = 5.0
+_OVERRIDES_RETRY_MAX_SECONDS = 300.0
 
 
 logger = logging.getLogger(__name__)
@@ -49,14 +59,90 @@ class AppContext:
     html_limiter: MinIntervalLimiter
 
     paused: bool = False
+    # (n_labels, storage.labels_version, threshold) from the last auto-filter computation.
+    threshold_cache: tuple[int, int, float] | None = None
+    # Overrides being edited by admin commands, not yet written; see edit_overrides().
+    overrides_cache: dict | None = None
+    _overrides_deadline: float = field(default=0.0, repr=False)
+    _overrides_task: asyncio.Task | None = field(default=None, repr=False)
+    # For alerting when a debounced overrides save fails; set by build_app_context.
+    application: Application | None = field(default=None, repr=False)
+    # key path -> (list inside overrides_cache, set of its items), for O(1) duplicate checks.
+    _overrides_lists: dict[tuple[str, ...], tuple[list, set]] = field(default_factory=dict, repr=False)
 
     async def reload_rules(self) -> None:
         rules = load_rules(self.config.rules_path, self.config.rules_overrides_path)
         self.rules = RuleEngine(rules)
 
+    def edit_overrides(self) -> dict:
+        """Overrides dict to mutate in place; follow with schedule_overrides_flush().
+
+        A burst of edits shares one load, one save and one rules rebuild.
+        """
+        if self.overrides_cache is None:
+            self.overrides_cache = load_yaml(self.config.rules_overrides_path)
+            self.overrides_cache.setdefault("version", 1)
+        return self.overrides_cache
+
+    def append_override(self, *path: str, item) -> bool:
+        """Append `item` to the overrides list at `path` (nested keys) unless present; True if added."""
+        entry = self._overrides_lists.get(path)
+        if entry is None:
+            node = self.edit_overrides()
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            items = node.setdefault(path[-1], [])
+            entry = self._overrides_lists[path] = (items, set(items))
+        items, members = entry
+        if item in members:
+            return False
+        members.add(item)
+        items.append(item)
+        return True
+
+    def schedule_overrides_flush(self) -> None:
+        self._overrides_deadline = time.monotonic() + _OVERRIDES_FLUSH_DELAY_SECONDS
+        if self._overrides_task is None or self._overrides_task.done():
+            self._overrides_task = asyncio.create_task(self._flush_overrides_later(), name="overrides_flush")
+
+    async def _flush_overrides_later(self) -> None:
+        failures = 0
+        while True:
+            # Each new edit pushes the deadline out; sleep until it stops moving.
+            while (delay := self._overrides_deadline - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.flush_overrides()
+            except Exception:
+                failures += 1
+                logger.exception("failed to save rules overrides (attempt %s); edits kept pending", failures)
+                if failures == 1:
+                    # The command already replied with success; say the change is not in effect yet.
+                    await self._alert("告警：规则修改保存失败，尚未生效，将自动重试。请检查 rules 目录是否可写。")
+                backoff = _OVERRIDES_RETRY_BASE_SECONDS * 2 ** (failures - 1)
+                self._overrides_deadline = time.monotonic() + min(_OVERRIDES_RETRY_MAX_SECONDS, backoff)
+                continue
+            if failures:
+                await self._alert(f"规则修改已在第 {failures + 1} 次尝试时保存并生效。")
+            return
+
+    async def _alert(self, text: str) -> None:
+        if self.application is not None:
+            await send_alert(self.application, self.config.alert_chat_id, text)
+
+    async def flush_overrides(self) -> None:
+        """Write pending overrides edits (if any) and rebuild the rules."""
+        data = self.overrides_cache
+        if data is None:
+            return
+        # Raises with the edits still pending, so the next edit, /rules_reload or shutdown retries them.
+        save_overrides(self.config.rules_overrides_path, data)
+        self.overrides_cache = None
+        self._overrides_lists.clear()
+        await self.reload_rules()
+
     async def reset_post(self, post_id: int) -> bool:
-        post = await self.storage.get_post(post_id)
-        if post is None:
+        if await self.storage.get_post_header(post_id) is None:
             return False
         await self.storage.reset_post(post_id)
         return True
@@ -85,6 +171,8 @@ async def build_app_context(config: Config, application: Application) -> AppCont
         timeout_seconds=config.nodeseek_http_timeout_seconds,
         max_retries=config.nodeseek_max_retries,
         user_agent=config.user_agent,
+        max_connections=config.nodeseek_http_max_connections,
+        backend=config.nodeseek_http_backend,
     )
 
     browser_fetcher = None
@@ -94,6 +182,8 @@ async def build_app_context(config: Config, application: Application) -> AppCont
             cookie_header=cookie,
             headless=config.playwright_headless,
             nav_timeout_seconds=config.playwright_nav_timeout_seconds,
+            user_agent=config.user_agent,
+            user_data_dir=config.sqlite_path.parent / "pw-profile",
         )
 
     crawler = CrawlerService(
@@ -125,7 +215,7 @@ async def build_app_context(config: Config, application: Application) -> AppCont
     return AppContext(
         config=config,
         storage=storage,
-        rss=AsyncRssPoller(config.rss_url),
+        rss=AsyncRssPoller(config.rss_url, user_agent=config.user_agent),
         crawler=crawler,
         ai=ai,
         rules=rules,
@@ -133,48 +223,22 @@ async def build_app_context(config: Config, application: Application) -> AppCont
         runtime_stats=RuntimeStats(),
         html_limiter=html_limiter,
         paused=False,
+        application=application,
     )
 
 
 async def start_background_jobs(application: Application, ctx: AppContext) -> None:
-    async def rss_job() -> None:
-        while True:
-            try:
-                await poll_rss_once(application, ctx)
-            except Exception:
-                logger.exception("rss job failed")
-            await asyncio.sleep(ctx.config.rss_interval_seconds)
-
-    async def process_job() -> None:
-        while True:
-            try:
-                await process_one(application, ctx)
-            except Exception:
-                logger.exception("process job failed")
-            await asyncio.sleep(10)
-
-    async def cleanup_job() -> None:
-        while True:
-            try:
-                await ctx.storage.cleanup(ctx.config.data_retention_days, ctx.config.fingerprint_retention_days)
-            except Exception:
-                logger.exception("cleanup job failed")
-            await asyncio.sleep(3600)
-
-    async def status_job() -> None:
-        while True:
-            try:
-                await write_status(application, ctx)
-            except Exception:
-                logger.exception("status job failed")
-            await asyncio.sleep(30)
+    scheduler = AsyncScheduler()
+    scheduler.add("rss_job", ctx.config.rss_interval_seconds, lambda: poll_rss_once(application, ctx))
+    scheduler.add("process_job", 10, lambda: process_one(application, ctx))
+    scheduler.add(
+        "cleanup_job",
+        3600,
+        lambda: ctx.storage.cleanup(ctx.config.data_retention_days, ctx.config.fingerprint_retention_days),
+    )
+    scheduler.add("status_job", 30, lambda: write_status(application, ctx))
 
-    ctx._tasks = [
-        asyncio.create_task(rss_job(), name="rss_job"),
-        asyncio.create_task(process_job(), name="process_job"),
-        asyncio.create_task(cleanup_job(), name="cleanup_job"),
-        asyncio.create_task(status_job(), name="status_job"),
-    ]
+    ctx._tasks = [asyncio.create_task(scheduler.run(), name="scheduler")]
 
 
 async def stop_background_jobs(application: Application, ctx: AppContext) -> None:
@@ -183,9 +247,19 @@ async def stop_background_jobs(application: Application, ctx: AppContext) -> Non
         t.cancel()
     await asyncio.gather(*tasks, return_exceptions=True)
 
+    # Don't lose admin rules edits still inside their flush delay.
+    if ctx._overrides_task is not None:
+        ctx._overrides_task.cancel()
+    try:
+        await ctx.flush_overrides()
+    except Exception:
+        # Still close the clients and the database below.
+        logger.exception("failed to save rules overrides on shutdown; pending edits lost")
+
     await ctx.ai.aclose()
     await ctx.crawler.aclose()
     await ctx.rss.aclose()
+    await aclose_image_client()
     await ctx.storage.close()
 
 
@@ -195,77 +269,107 @@ async def poll_rss_once(application: Application, ctx: AppContext) -> None:
         await asyncio.sleep(random.uniform(0.0, float(ctx.config.rss_jitter_seconds)))
 
     ctx.metrics.rss_polls_total.inc()
-    items = await ctx.rss.poll()
+    discovered = 0
+    batch: list[FeedItem] = []
+    async for it in ctx.rss.iter_poll():
+        batch.append(it)
+        if len(batch) >= _RSS_UPSERT_BATCH:
+            await ctx.storage.upsert_from_feed_many(batch)
+            discovered += len(batch)
+            batch = []
     ctx.runtime_stats.last_rss_poll_ts = time.time()
 
-    discovered = 0
-    for it in items:
-        await ctx.storage.upsert_from_feed(it)
-        discovered += 1
+    if batch:
+        await ctx.storage.upsert_from_feed_many(batch)
+        discovered += len(batch)
 
     ctx.metrics.posts_discovered_total.inc(discovered)
     logger.info("rss poll: %s items", discovered)
 
 
-def _should_attempt_fulltext(ctx: AppContext, title: str, rss_text: str) -> bool:
+def _should_attempt_fulltext(ctx: AppContext, title: str, rss_text: str) -> tuple[bool, ScoreResult | None]:
+    """Decide whether to fetch the full text; also return the RSS-only score if one was computed."""
     if not ctx.config.fulltext_enabled:
-        return False
+        return False, None
     if not ctx.config.nodeseek_cookie:
-        return False
+        return False, None
     if ctx.crawler.fulltext_disabled():
-        return False
+        return False, None
 
     policy = (ctx.config.fulltext_fetch_policy or "near_threshold").strip().lower()
     if policy == "never":
-        return False
+        return False, None
     if policy == "always":
-        return True
+        return True, None
 
     # near_threshold: quick score on RSS-only text
-    s = ctx.rules.score(title=title, text=rss_text, source_confidence="RSS_ONLY")
+    s = ctx.rules.score(title=title, text=rss_text, source_confidence=CONF_RSS_ONLY)
     if s.decision == "WHITELIST":
-        return True
+        return True, s
     threshold = float(s.explain.get("threshold", 18))
     delta = float(ctx.config.fulltext_near_threshold_delta)
-    return s.score_total >= (threshold - delta)
+    return s.score_total >= (threshold - delta), s
 
 
-def _update_fetch_stats_and_metrics(ctx: AppContext, attempts: list) -> None:
+def _update_fetch_stats_and_metrics(ctx: AppContext, attempts: list[FetchAttempt]) -> None:
     if not attempts:
         return
 
-    any_ok = any(getattr(a, "ok", False) for a in attempts)
+    any_ok = False
+    login_failed = False
+    http_ok = http_fail = browser_ok = browser_fail = 0
+    for a in attempts:
+        if a.ok:
+            any_ok = True
+        if a.error_type == ERROR_LOGIN_REQUIRED:
+            login_failed = True
+        if a.method == "HTTP":
+            if a.ok:
+                http_ok += 1
+            else:
+                http_fail += 1
+        elif a.method == "BROWSER":
+            if a.ok:
+                browser_ok += 1
+            else:
+                browser_fail += 1
+
+    stats = ctx.runtime_stats
     if any_ok:
-        ctx.runtime_stats.consecutive_fetch_failures = 0
+        stats.consecutive_fetch_failures = 0
     else:
-        ctx.runtime_stats.consecutive_fetch_failures += 1
+        stats.consecutive_fetch_failures += 1
 
-    login_failed = any(getattr(a, "error_type", None) == ERROR_LOGIN_REQUIRED for a in attempts)
     if login_failed:
-        ctx.runtime_stats.consecutive_login_failures += 1
+        stats.consecutive_login_failures += 1
     elif any_ok:
-        ctx.runtime_stats.consecutive_login_failures = 0
+        stats.consecutive_login_failures = 0
 
-    ctx.metrics.set_consecutive("fetch", ctx.runtime_stats.consecutive_fetch_failures)
-    ctx.metrics.set_consecutive("login", ctx.runtime_stats.consecutive_login_failures)
+    ctx.metrics.set_consecutive_many(
+        {"fetch": stats.consecutive_fetch_failures, "login": stats.consecutive_login_failures}
+    )
+
+    # One inc() per counter rather than per attempt.
+    for counter, n in (
+        (ctx.metrics.fetch_http_success_total, http_ok),
+        (ctx.metrics.fetch_http_fail_total, http_fail),
+        (ctx.metrics.fetch_browser_success_total, browser_ok),
+        (ctx.metrics.fetch_browser_fail_total, browser_fail),
+    ):
+        if n:
+            counter.inc(n)
 
-    for a in attempts:
-        method = getattr(a, "method", "")
-        ok = bool(getattr(a, "ok", False))
-        if method == "HTTP":
-            (ctx.metrics.fetch_http_success_total if ok else ctx.metrics.fetch_http_fail_total).inc()
-        if method == "BROWSER":
-            (ctx.metrics.fetch_browser_success_total if ok else ctx.metrics.fetch_browser_fail_total).inc()
 
+def _compute_best_threshold(scores: Sequence[float], labels: Sequence[int]) -> float:
+    """Score threshold with the best F1 over parallel (score, y) arrays, y=1 for useful.
 
-async def _compute_best_threshold(labeled: list[tuple[float, int]]) -> float:
-    if not labeled:
+    Expects scores in descending order, as Storage.get_labeled_scores returns them.
+    """
+    total = len(scores)
+    if not total:
         return float("inf")
 
-    # Sort descending by score
-    labeled_sorted = sorted(labeled, key=lambda x: float(x[0]), reverse=True)
-    total_pos = sum(1 for _, y in labeled_sorted if int(y) == 1)
-    total = len(labeled_sorted)
+    total_pos = sum(labels)
 
     # If no useful labels, prefer predicting none.
     if total_pos <= 0:
@@ -273,34 +377,22 @@ async def _compute_best_threshold(labeled: list[tuple[float, int]]) -> float:
 
     # If all useful, predict all.
     if total_pos >= total:
-        return float(labeled_sorted[-1][0])
+        return float(scores[-1])
 
     best_f1 = -1.0
-    best_threshold = float(labeled_sorted[0][0])
+    best_threshold = float(scores[0])
 
     tp = 0
-    fp = 0
-
-    idx = 0
-    while idx < total:
-        score_val = float(labeled_sorted[idx][0])
-
-        # Include all items with this score
-        while idx < total and float(labeled_sorted[idx][0]) == score_val:
-            y = int(labeled_sorted[idx][1])
-            if y == 1:
-                tp += 1
-            else:
-                fp += 1
-            idx += 1
-
-        fn = total_pos - tp
-        denom = (2 * tp + fp + fn)
-        f1 = (2 * tp / denom) if denom > 0 else 0.0
-
+    seen = 0
+    # Sweep one equal-score group at a time; 2tp + fp + fn == seen + total_pos.
+    for score_val, group in groupby(zip(scores, labels), key=itemgetter(0)):
+        for _, y in group:
+            tp += y
+            seen += 1
+        f1 = 2 * tp / (seen + total_pos)
         if f1 > best_f1:
             best_f1 = f1
-            best_threshold = score_val
+            best_threshold = float(score_val)
 
     return best_threshold
 
@@ -313,8 +405,14 @@ async def _should_deliver(ctx: AppContext, score_total: float, decision: str) ->
     if n_labels < _MIN_LABELS_TO_AUTOFILTER:
         return True
 
-    labeled_scores = await ctx.storage.get_labeled_scores(limit=_MIN_LABELS_TO_AUTOFILTER)
-    threshold = await _compute_best_threshold(labeled_scores)
+    version = ctx.storage.labels_version
+    cached = ctx.threshold_cache
+    if cached is not None and cached[0] == n_labels and cached[1] == version:
+        threshold = cached[2]
+    else:
+        scores, labels = await ctx.storage.get_labeled_scores(limit=_MIN_LABELS_TO_AUTOFILTER)
+        threshold = await asyncio.to_thread(_compute_best_threshold, scores, labels)
+        ctx.threshold_cache = (n_labels, version, threshold)
 
     if threshold == float("inf"):
         return False
@@ -348,7 +446,8 @@ async def process_one(application: Application, ctx: AppContext) -> None:
     image_urls: list[str] = []
 
     tried_fulltext = False
-    if _should_attempt_fulltext(ctx, post.title, rss_text):
+    attempt_fulltext, rss_score = _should_attempt_fulltext(ctx, post.title, rss_text)
+    if attempt_fulltext:
         tried_fulltext = True
         try:
             content_result, attempts = await ctx.crawler.fetch_best_effort(post.url, rss_text)
@@ -386,17 +485,31 @@ async def process_one(application: Application, ctx: AppContext) -> None:
         )
 
     # Record attempts
-    for idx, a in enumerate(attempts, start=1):
-        await ctx.storage.add_fetch_attempt(post_id, idx, a)
+    await ctx.storage.add_fetch_attempts(post_id, attempts)
 
     # AI summary
     summary = await ctx.storage.load_summary(post_id)
+    base_score = None
+    # Scoring is deterministic, so the pre-fetch score is reusable when the inputs did not change.
+    same_as_rss = content_text == rss_text and source_conf == CONF_RSS_ONLY
     if summary is None:
         ctx.metrics.ai_calls_total.inc()
+        # Score the plain content in a worker while the AI round-trip is in flight; it is the
+        # final score if summarizing fails. Awaited after the AI block so a rules error is not
+        # counted (or timed) as an AI failure.
+        score_task: asyncio.Task | None = None
+        if same_as_rss and rss_score is not None:
+            base_score = rss_score
+        else:
+            score_task = asyncio.create_task(
+                asyncio.to_thread(ctx.rules.score, title=post.title, text=content_text, source_confidence=source_conf)
+            )
         try:
             rich_text = ""
             if content_html and ctx.config.rich_text_enabled:
-                rich_text = html_to_rich_text(
+                # CPU-bound DOM walk; keep it off the event loop shared with the bot and RSS jobs.
+                rich_text = await asyncio.to_thread(
+                    html_to_rich_text,
                     content_html,
                     base_url=post.url,
                     cfg=RichTextConfig(
@@ -470,6 +583,14 @@ async def process_one(application: Application, ctx: AppContext) -> None:
             )
             logger.warning("ai summarize failed post_id=%s err=%s", post_id, e)
             summary = None
+        except BaseException:
+            # Cancelled mid-summary: don't leave the scoring task behind unretrieved.
+            if score_task is not None:
+                score_task.cancel()
+            raise
+
+        if score_task is not None:
+            base_score = await score_task
 
     # Score (include AI-extracted text to improve recall)
     score_input = content_text
@@ -477,12 +598,15 @@ async def process_one(application: Application, ctx: AppContext) -> None:
         extras = summary.key_points + summary.actions + (summary.image_summaries or [])
         score_input = score_input + "\n\n" + summary.summary_text + "\n" + "\n".join(extras)
 
-    score = ctx.rules.score(title=post.title, text=score_input, source_confidence=source_conf)
-    await ctx.storage.save_score(post_id, score)
+    if summary is None and base_score is not None:
+        score = base_score
+    else:
+        score = ctx.rules.score(title=post.title, text=score_input, source_confidence=source_conf)
 
     # Decide delivery
     deliver = await _should_deliver(ctx, score.score_total, score.decision)
     if deliver:
+        await ctx.storage.save_score(post_id, score)
         if not await ctx.storage.has_delivery(post_id, ctx.config.target_chat_id):
             msg = render_message(post, summary, score)
             keyboard = build_inline_keyboard(post_id)
@@ -493,12 +617,17 @@ async def process_one(application: Application, ctx: AppContext) -> None:
                 disable_web_page_preview=True,
                 reply_markup=keyboard,
             )
-            await ctx.storage.record_delivery(post_id, ctx.config.target_chat_id, sent.message_id)
+            async with ctx.storage.transaction():
+                await ctx.storage.record_delivery(post_id, ctx.config.target_chat_id, sent.message_id)
+                await ctx.storage.update_fingerprint_processed(post.url_hash, score.decision)
             ctx.metrics.notifications_sent_total.inc()
-        await ctx.storage.update_fingerprint_processed(post.url_hash, score.decision)
+        else:
+            await ctx.storage.update_fingerprint_processed(post.url_hash, score.decision)
     else:
-        await ctx.storage.set_status(post_id, STATUS_IGNORED)
-        await ctx.storage.update_fingerprint_processed(post.url_hash, score.decision)
+        async with ctx.storage.transaction():
+            await ctx.storage.save_score(post_id, score)
+            await ctx.storage.set_status(post_id, STATUS_IGNORED)
+            await ctx.storage.update_fingerprint_processed(post.url_hash, score.decision)
         ctx.metrics.notifications_ignored_total.inc()
 
     ctx.metrics.posts_processed_total.inc()
@@ -510,9 +639,13 @@ async def write_status(application: Application, ctx: AppContext) -> None:
     stats.fulltext_disabled = ctx.crawler.fulltext_disabled()
     stats.html_next_allowed_in_seconds = ctx.html_limiter.next_allowed_in_seconds()
 
-    ctx.metrics.set_consecutive("fetch", stats.consecutive_fetch_failures)
-    ctx.metrics.set_consecutive("login", stats.consecutive_login_failures)
-    ctx.metrics.set_consecutive("ai", stats.consecutive_ai_failures)
+    ctx.metrics.set_consecutive_many(
+        {
+            "fetch": stats.consecutive_fetch_failures,
+            "login": stats.consecutive_login_failures,
+            "ai": stats.consecutive_ai_failures,
+        }
+    )
 
     data = {
         "paused": stats.paused,
@@ -526,4 +659,4 @@ async def write_status(application: Application, ctx: AppContext) -> None:
             "ai": stats.consecutive_ai_failures,
         },
     }
-    write_status_json(ctx.config.status_json_path, data)
+    await asyncio.to_thread(write_status_json, ctx.config.status_json_path, data)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Job:
+    name: str
+    interval_seconds: float
+    fn: Callable[[], Awaitable[None]]
+
+
+class AsyncScheduler:
+    """Run periodic jobs from a single timer loop.
+
+    Each run gets its own task and the job is re-armed `interval_seconds` after it finishes,
+    so a slow job neither overlaps itself nor delays the others.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, _Job]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._running: set[asyncio.Task] = set()
+
+    def add(self, name: str, interval_seconds: float, fn: Callable[[], Awaitable[None]]) -> None:
+        # Deadline 0 means "run on the first tick".
+        job = _Job(name=name, interval_seconds=max(0.0, float(interval_seconds)), fn=fn)
+        heapq.heappush(self._heap, (0.0, next(self._seq), job))
+        self._wake.set()
+
+    async def _run_job(self, job: _Job) -> None:
+        try:
+            await job.fn()
+        except Exception:
+            logger.exception("%s failed", job.name)
+        finally:
+            deadline = asyncio.get_running_loop().time() + job.interval_seconds
+            heapq.heappush(self._heap, (deadline, next(self._seq), job))
+            self._wake.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                now = loop.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, job = heapq.heappop(self._heap)
+                    task = asyncio.create_task(self._run_job(job), name=job.name)
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+                self._wake.clear()
+                timeout = self._heap[0][0] - now if self._heap else None
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except TimeoutError:
+                    pass
+        finally:
+            running = list(self._running)
+            for t in running:
+                t.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
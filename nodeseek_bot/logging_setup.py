@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import sys
 
 
+_listener: QueueListener | None = None
+
+
 def setup_logging(level: str, log_file: str) -> None:
     root = logging.getLogger()
     root.setLevel(level.upper())
@@ -30,8 +35,24 @@ def setup_logging(level: str, log_file: str) -> None:
         file_handler.setFormatter(formatter)
         handlers.append(file_handler)
 
-    for handler in handlers:
-        root.addHandler(handler)
+    # Records are formatted and written by the listener thread, never on the event loop.
+    global _listener
+    stop_logging()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("telegram").setLevel(logging.INFO)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -5,7 +5,13 @@ from urllib.parse import urljoin
 
 from selectolax.parser import HTMLParser, Node
 
-from nodeseek_bot.utils import collapse_ws, truncate
+from nodeseek_bot.utils import collapse_ws, collapse_ws_inline, truncate
+
+
+# Post body containers, matched in one query (first in document order wins).
+_ROOT_SEL = "article, .post-content, .topic-content, .markdown-body"
+_ROW_SEL = "tr"
+_CELL_SEL = "th, td"
 
 
 @dataclass(frozen=True)
@@ -62,160 +68,171 @@ def _append_nonempty(lines: list[str], s: str) -> None:
         lines.append(s)
 
 
+def _emit_blank(lines: list[str]) -> None:
+    # At most one blank line between blocks, and none at the start.
+    if lines and lines[-1] != "":
+        lines.append("")
+
+
 def _render_table(table: Node, cfg: RichTextConfig) -> list[str]:
-    rows = table.css("tr")
+    rows = table.css(_ROW_SEL)
     if not rows:
         return []
 
     out: list[list[str]] = []
     for r in rows[: max(1, int(cfg.max_table_rows))]:
-        cells = r.css("th, td")
+        cells = r.css(_CELL_SEL)
         if not cells:
             continue
-        out.append([collapse_ws(c.text(separator=" ")) for c in cells])
+        out.append([collapse_ws_inline(c.text(separator=" ")) for c in cells])
 
     if not out:
         return []
 
     # Normalize column count
     ncol = max(len(r) for r in out)
-    for r in out:
-        while len(r) < ncol:
-            r.append("")
+    sep = "| " + " | ".join(["---"] * ncol) + " |"
 
     lines: list[str] = []
-    header = out[0]
-    lines.append("| " + " | ".join(header) + " |")
-    lines.append("| " + " | ".join(["---"] * ncol) + " |")
-    for r in out[1:]:
-        lines.append("| " + " | ".join(r) + " |")
+    for i, r in enumerate(out):
+        lines.append("| " + " | ".join(r + [""] * (ncol - len(r))) + " |")
+        if i == 0:
+            lines.append(sep)
 
     return lines
 
 
 def _render_list(list_node: Node, ordered: bool, base_url: str, indent: int, budget: _Budget) -> list[str]:
     lines: list[str] = []
-    items = list_node.css("> li")
-    for idx, li in enumerate(items, start=1):
+    pad = "  " * indent
+    idx = 0
+    for li in list_node.iter(include_text=False):
+        if li.tag != "li":
+            continue
+        idx += 1
         prefix = f"{idx}. " if ordered else "- "
-        pad = "  " * indent
 
-        # Render non-nested content first
+        # Item text without its nested lists, which are rendered below with more indent.
         parts: list[str] = []
-        for child in li.iter(include_text=False):
-            # stop at nested lists: handled separately
+        nested: list[Node] = []
+        for child in li.iter(include_text=True):
             if child.tag in {"ul", "ol"}:
-                break
-        # A simpler approach: take li.text but it includes nested list text; we try to remove it
-        txt = collapse_ws(li.text(separator=" "))
+                nested.append(child)
+            else:
+                parts.append(child.text(separator=" "))
+        txt = collapse_ws_inline(" ".join(parts))
         if txt:
-            parts.append(txt)
-        line = pad + prefix + " ".join(parts).strip()
-        _append_nonempty(lines, line)
+            lines.append(pad + prefix + txt)
 
-        # nested lists
-        for child in li.css("> ul, > ol"):
+        for child in nested:
             lines.extend(_render_list(child, ordered=(child.tag == "ol"), base_url=base_url, indent=indent + 1, budget=budget))
 
     return lines
 
 
-def _walk(node: Node, *, base_url: str, indent: int, budget: _Budget, out: list[str], cfg: RichTextConfig) -> None:
-    tag = (node.tag or "").lower()
-
+def _render_node(node: Node, tag: str, *, base_url: str, budget: _Budget, out: list[str], cfg: RichTextConfig) -> bool:
+    """Render a block-level node into `out`; return False if its children should be walked instead."""
     if tag in {"script", "style", "noscript"}:
-        return
+        return True
 
     if tag in {"h1", "h2", "h3", "h4", "h5", "h6"}:
         level = int(tag[1])
         txt = _node_text(node)
-        _append_nonempty(out, "#" * level + " " + txt)
-        return
+        if txt:
+            out.append("#" * level + " " + txt)
+        return True
 
     if tag == "p":
         txt = _node_text(node)
-        _append_nonempty(out, txt)
-        return
+        if txt:
+            out.append(txt)
+        return True
 
     if tag == "br":
-        out.append("")
-        return
+        _emit_blank(out)
+        return True
 
     if tag == "blockquote":
         txt = _node_text(node)
         if txt:
             for line in txt.split("\n"):
                 _append_nonempty(out, "> " + line)
-            out.append("")
-        return
+            _emit_blank(out)
+        return True
 
     if tag == "pre":
         code_node = node.css_first("code")
         code_text = (code_node.text() if code_node is not None else node.text()) or ""
         code_text = code_text.replace("\r\n", "\n").replace("\r", "\n").strip("\n")
         if not code_text:
-            return
+            return True
 
         trimmed = code_text
         if len(trimmed) > 2000:
             trimmed = trimmed[:2000] + "\n…"
 
         if not budget.can_add_code_block(len(trimmed)):
-            return
+            return True
 
         budget.add_code_block(len(trimmed))
         out.append("```")
         out.append(trimmed)
         out.append("```")
-        out.append("")
-        return
+        _emit_blank(out)
+        return True
 
     if tag == "table":
         out.extend(_render_table(node, cfg))
-        out.append("")
-        return
-
-    if tag == "ul":
-        out.extend(_render_list(node, ordered=False, base_url=base_url, indent=indent, budget=budget))
-        out.append("")
-        return
+        _emit_blank(out)
+        return True
 
-    if tag == "ol":
-        out.extend(_render_list(node, ordered=True, base_url=base_url, indent=indent, budget=budget))
-        out.append("")
-        return
+    if tag in {"ul", "ol"}:
+        out.extend(_render_list(node, ordered=(tag == "ol"), base_url=base_url, indent=0, budget=budget))
+        _emit_blank(out)
+        return True
 
     if tag == "img":
         alt = (node.attributes.get("alt") or "").strip()
         src = _safe_join(base_url, node.attributes.get("src") or node.attributes.get("data-src") or "")
         if src:
-            _append_nonempty(out, f"[image] {alt} {src}".strip())
-        return
+            out.append(f"[image] {alt} {src}" if alt else f"[image] {src}")
+        return True
 
     if tag == "a":
         href = _safe_join(base_url, node.attributes.get("href") or "")
-        txt = collapse_ws(node.text(separator=" "))
+        txt = collapse_ws_inline(node.text(separator=" "))
         if href and budget.can_add_link():
             budget.add_link()
-            if txt:
-                _append_nonempty(out, f"[{txt}]({href})")
-            else:
-                _append_nonempty(out, href)
-        else:
-            _append_nonempty(out, txt)
+            out.append(f"[{txt}]({href})" if txt else href)
+        elif txt:
+            out.append(txt)
+        return True
+
+    return False
+
+
+def _walk(root: Node, *, base_url: str, budget: _Budget, out: list[str], cfg: RichTextConfig) -> None:
+    if _render_node(root, (root.tag or "").lower(), base_url=base_url, budget=budget, out=out, cfg=cfg):
         return
 
-    # Default: walk children
-    for child in node.child_nodes:
+    # Iterative DFS over child iterators; block nodes are rendered whole and not descended into.
+    stack = [root.iter(include_text=True)]
+    while stack:
+        child = next(stack[-1], None)
         if child is None:
+            stack.pop()
             continue
-        if getattr(child, "tag", None) is None:
-            # text node
-            txt = collapse_ws(str(child))
+        tag = (child.tag or "").lower()
+        if tag == "-text":
+            txt = collapse_ws(child.text(deep=False))
             if txt:
-                _append_nonempty(out, txt)
+                out.append(txt)
+            continue
+        if tag.startswith(("-", "_")):
+            # comments and other non-element nodes
             continue
-        _walk(child, base_url=base_url, indent=indent, budget=budget, out=out, cfg=cfg)
+        if not _render_node(child, tag, base_url=base_url, budget=budget, out=out, cfg=cfg):
+            stack.append(child.iter(include_text=True))
 
 
 def html_to_rich_text(html: str, *, base_url: str = "", cfg: RichTextConfig | None = None) -> str:
@@ -233,14 +250,14 @@ def html_to_rich_text(html: str, *, base_url: str = "", cfg: RichTextConfig | No
     tree = HTMLParser(html)
 
     # choose a reasonable root
-    root = tree.css_first("article") or tree.css_first(".post-content") or tree.css_first(".topic-content") or tree.css_first(".markdown-body")
+    root = tree.css_first(_ROOT_SEL)
     if root is None:
         root = tree.root
 
     budget = _Budget(c)
     out: list[str] = []
-    _walk(root, base_url=base_url, indent=0, budget=budget, out=out, cfg=c)
+    _walk(root, base_url=base_url, budget=budget, out=out, cfg=c)
 
-    text = "\n".join([line.rstrip() for line in out])
-    text = text.replace("\n\n\n", "\n\n")
+    # Every emitter appends trimmed lines (or the blank separator), so no per-line rstrip.
+    text = "\n".join(out)
     return truncate(text.strip(), int(c.max_chars))
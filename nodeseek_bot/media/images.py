@@ -6,21 +6,34 @@ import ipaddress
 import logging
 import mimetypes
 import socket
+import time
 from dataclasses import dataclass
+from functools import lru_cache
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from itertools import islice
 from urllib.parse import urlparse
 
 import httpx
 
+try:
+    # SIMD base64 (libbase64); images can be several MB.
+    from pybase64 import b64encode_as_string as _b64encode_str
+except ImportError:  # pragma: no cover - optional accelerator
+    def _b64encode_str(data: bytes | memoryview) -> str:
+        return base64.b64encode(data).decode("ascii")
+
 
 logger = logging.getLogger(__name__)
 
 
-_DISALLOWED_HOSTS = {
-    "localhost",
-    "127.0.0.1",
-    "0.0.0.0",
-    "::1",
-}
+_DISALLOWED_HOSTS = frozenset(
+    {
+        "localhost",
+        "127.0.0.1",
+        "0.0.0.0",
+        "::1",
+    }
+)
 
 
 @dataclass(frozen=True)
@@ -31,47 +44,59 @@ class ImageData:
     size_bytes: int
 
 
-def _is_ip_literal(hostname: str | None) -> bool:
-    if not hostname:
-        return False
+def _ip_literal(hostname: str) -> ipaddress.IPv4Address | ipaddress.IPv6Address | None:
     try:
-        ipaddress.ip_address(hostname)
-        return True
-    except Exception:
-        return False
+        return ipaddress.ip_address(hostname)
+    except ValueError:
+        return None
 
 
-def _is_private_ip(ip_str: str | None) -> bool:
-    if not ip_str:
-        return False
-    try:
-        ip = ipaddress.ip_address(ip_str)
-    except Exception:
-        return False
+def _is_blocked_ip(ip: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool:
+    # ::ffff:a.b.c.d reaches the IPv4 host; judge it by that address.
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # is_global already excludes private/loopback/link-local/reserved/unspecified;
+    # multicast ranges count as global, so reject them explicitly.
+    return not ip.is_global or ip.is_multicast
+
+
+async def _check_host(hostname: str) -> tuple[bool, list[str]]:
+    """Return (allowed, ips) for a lowercased hostname in one pass.
+
+    IP literals are parsed once and never hit DNS; other hosts are resolved
+    (cached) and rejected if any address is non-global (best-effort SSRF guard).
+    """
+    if hostname in _DISALLOWED_HOSTS:
+        return False, []
 
-    return bool(
-        ip.is_private
-        or ip.is_loopback
-        or ip.is_link_local
-        or ip.is_multicast
-        or ip.is_reserved
-        or ip.is_unspecified
-    )
+    ip = _ip_literal(hostname)
+    if ip is not None:
+        return not _is_blocked_ip(ip), [hostname]
 
+    ips = await _resolve_to_ips_cached(hostname)
+    for addr in ips:
+        resolved = _ip_literal(addr)
+        if resolved is not None and _is_blocked_ip(resolved):
+            return False, ips
+    return True, ips
 
-def _should_send_cookie(hostname: str | None, host_suffixes: list[str]) -> bool:
+
+def _normalize_host_suffixes(host_suffixes: list[str]) -> frozenset[str]:
+    return frozenset(s for s in ((x or "").strip(".").lower() for x in host_suffixes) if s)
+
+
+def _should_send_cookie(hostname: str | None, host_suffixes: frozenset[str]) -> bool:
     if not hostname:
         return False
     host = hostname.strip(".").lower()
-    if not host:
-        return False
-
-    for suffix in host_suffixes:
-        s = (suffix or "").strip(".").lower()
-        if not s:
-            continue
-        if host == s or host.endswith("." + s):
+    # Check the host and each parent domain: one set lookup per label.
+    while host:
+        if host in host_suffixes:
             return True
+        dot = host.find(".")
+        if dot < 0:
+            return False
+        host = host[dot + 1 :]
     return False
 
 
@@ -88,11 +113,6 @@ def _guess_mime_type(url: str, content_type: str | None) -> str:
     return "application/octet-stream"
 
 
-def _to_data_url(mime_type: str, content: bytes) -> str:
-    b64 = base64.b64encode(content).decode("ascii")
-    return f"data:{mime_type};base64,{b64}"
-
-
 def _resolve_to_ips(hostname: str) -> list[str]:
     """Resolve hostname to IPs (best-effort).
 
@@ -116,6 +136,96 @@ def _resolve_to_ips(hostname: str) -> list[str]:
     return ips
 
 
+_DNS_TTL_SECONDS = 60.0
+_DNS_CACHE_MAX = 512
+# hostname -> (expires_at_monotonic, ips); insertion-ordered so the oldest entry is evicted first.
+_dns_cache: dict[str, tuple[float, list[str]]] = {}
+
+
+async def _resolve_to_ips_cached(hostname: str) -> list[str]:
+    now = time.monotonic()
+    hit = _dns_cache.get(hostname)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+
+    # getaddrinfo blocks; keep it off the event loop.
+    ips = await asyncio.to_thread(_resolve_to_ips, hostname)
+    _dns_cache.pop(hostname, None)
+    if len(_dns_cache) >= _DNS_CACHE_MAX:
+        _dns_cache.pop(next(iter(_dns_cache)))
+    _dns_cache[hostname] = (now + _DNS_TTL_SECONDS, ips)
+    return ips
+
+
+class _ByteBudget:
+    """Total-bytes budget shared by the concurrent downloads of one call.
+
+    reserve/release never await, so each call is atomic on the event loop.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(0, int(limit))
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.used
+
+    def reserve(self, n: int) -> bool:
+        if self.used + n > self.limit:
+            return False
+        self.used += n
+        return True
+
+    def release(self, n: int) -> None:
+        self.used = max(0, self.used - n)
+
+
+def _content_length(value: str | None) -> int | None:
+    try:
+        n = int((value or "").strip())
+    except ValueError:
+        return None
+    return n if n >= 0 else None
+
+
+@lru_cache(maxsize=8)
+def _timeout(seconds: float) -> httpx.Timeout:
+    return httpx.Timeout(seconds)
+
+
+def _dedup_urls(urls: list[str] | None, max_count: int) -> list[str]:
+    # Stripped, non-empty, first occurrence wins, order kept.
+    unique = dict.fromkeys(u for u in (x.strip() for x in urls or () if x) if u)
+    return list(islice(unique, max(0, max_count)))
+
+
+# Shared across calls so connections (and TLS sessions) to image hosts are kept alive
+# between posts; created on first use, closed by aclose_image_client().
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client(concurrency: int) -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        n = max(1, int(concurrency))
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            http2=True,
+            # Never keep response cookies across calls; the only Cookie sent is the explicit header.
+            cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])),
+            limits=httpx.Limits(max_connections=max(n, 10), max_keepalive_connections=n),
+        )
+    return _client
+
+
+async def aclose_image_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
 async def download_images_as_data_urls(
     urls: list[str],
     *,
@@ -138,97 +248,97 @@ async def download_images_as_data_urls(
     - Sends Cookie only to whitelisted host suffixes.
     """
 
-    cleaned: list[str] = []
-    seen: set[str] = set()
-    for u in urls or []:
-        u = (u or "").strip()
-        if not u:
-            continue
-        if u in seen:
-            continue
-        seen.add(u)
-        cleaned.append(u)
-        if len(cleaned) >= int(max_count):
-            break
-
+    cleaned = _dedup_urls(urls, int(max_count))
     if not cleaned:
         return []
 
-    timeout = httpx.Timeout(timeout_seconds)
-    limits = httpx.Limits(max_connections=max(1, int(concurrency)), max_keepalive_connections=10)
+    timeout = _timeout(timeout_seconds)
+    client = _get_client(concurrency)
 
     sem = asyncio.Semaphore(max(1, int(concurrency)))
-    total_bytes = 0
+    budget = _ByteBudget(max_total_bytes)
+    max_bytes = int(max_bytes_per_image)
     out: list[ImageData] = []
 
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True, limits=limits) as client:
-        async def fetch_one(url: str) -> None:
-            nonlocal total_bytes
-
-            parsed = urlparse(url)
-            scheme = (parsed.scheme or "").lower()
-            if scheme not in {"http", "https"}:
-                return
-
-            hostname = (parsed.hostname or "").lower()
-            if not hostname:
-                return
-            if hostname in _DISALLOWED_HOSTS:
-                return
-
-            if _is_ip_literal(hostname):
-                if _is_private_ip(hostname):
-                    return
-            else:
-                # Best-effort DNS defense
-                for ip in _resolve_to_ips(hostname):
-                    if _is_private_ip(ip):
+    suffixes = _normalize_host_suffixes(cookie_host_suffixes)
+    # Per-call memo: images of one post usually share a host or two.
+    blocked: dict[str, bool] = {}
+
+    async def is_blocked(hostname: str) -> bool:
+        hit = blocked.get(hostname)
+        if hit is None:
+            allowed, _ = await _check_host(hostname)
+            hit = blocked[hostname] = not allowed
+        return hit
+
+    async def fetch_one(url: str) -> None:
+        parsed = urlparse(url)
+        scheme = (parsed.scheme or "").lower()
+        if scheme not in {"http", "https"}:
+            return
+
+        hostname = (parsed.hostname or "").lower()
+        if not hostname:
+            return
+        if await is_blocked(hostname):
+            return
+
+        headers = {"User-Agent": user_agent}
+        if cookie_header and _should_send_cookie(hostname, suffixes):
+            headers["Cookie"] = cookie_header
+
+        async with sem:
+            # Bytes of this image counted against the shared budget so far.
+            size = 0
+            try:
+                async with client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+                    if resp.status_code >= 400:
                         return
 
-            headers = {"User-Agent": user_agent}
-            if cookie_header and _should_send_cookie(hostname, cookie_host_suffixes):
-                headers["Cookie"] = cookie_header
-
-            async with sem:
-                try:
-                    resp = await client.get(url, headers=headers)
-                    if resp.status_code >= 400:
+                    # Skip the body entirely when the declared size can't fit.
+                    declared = _content_length(resp.headers.get("Content-Length"))
+                    if declared is not None and declared > min(max_bytes, budget.remaining):
                         return
 
                     mime_type = _guess_mime_type(url, resp.headers.get("Content-Type"))
 
-                    # Stream to enforce byte limits.
-                    buf = bytearray()
+                    # Base64-encode whole 3-byte groups as they arrive so the raw body is
+                    # never held in full alongside its encoding.
+                    parts = [f"data:{mime_type};base64,"]
+                    carry = b""
                     async for chunk in resp.aiter_bytes():
                         if not chunk:
                             continue
-
-                        if len(buf) + len(chunk) > int(max_bytes_per_image):
-                            return
-                        if total_bytes + len(buf) + len(chunk) > int(max_total_bytes):
+                        if size + len(chunk) > max_bytes or not budget.reserve(len(chunk)):
+                            budget.release(size)
+                            size = 0
                             return
 
-                        buf.extend(chunk)
-
-                    content = bytes(buf)
-                    if not content:
-                        return
-
-                    # Update total after successful download
-                    total_bytes += len(content)
+                        size += len(chunk)
+                        data = carry + chunk if carry else chunk
+                        cut = len(data) - len(data) % 3
+                        if cut:
+                            parts.append(_b64encode_str(memoryview(data)[:cut]))
+                        carry = data[cut:]
 
-                    out.append(
-                        ImageData(
-                            url=url,
-                            mime_type=mime_type,
-                            data_url=_to_data_url(mime_type, content),
-                            size_bytes=len(content),
-                        )
-                    )
-                except Exception as e:
-                    logger.debug("image download failed url=%s err=%s", url, e)
+                if not size:
                     return
+                if carry:
+                    parts.append(_b64encode_str(carry))
+
+                out.append(
+                    ImageData(
+                        url=url,
+                        mime_type=mime_type,
+                        data_url="".join(parts),
+                        size_bytes=size,
+                    )
+                )
+            except Exception as e:
+                budget.release(size)
+                logger.debug("image download failed url=%s err=%s", url, e)
+                return
 
-        await asyncio.gather(*(fetch_one(u) for u in cleaned))
+    await asyncio.gather(*(fetch_one(u) for u in cleaned))
 
     return out
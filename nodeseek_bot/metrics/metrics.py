@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import json
 import logging
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import orjson
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 
@@ -43,18 +43,26 @@ class Metrics:
         self.notifications_ignored_total = Counter("notifications_ignored_total", "Ignored notifications")
 
         self.consecutive_failures = Gauge("consecutive_failures", "Consecutive failures", ["type"])
+        # Resolve the labelled children once; labels() takes the metric lock on every call.
+        self._consecutive = {t: self.consecutive_failures.labels(type=t) for t in ("fetch", "login", "ai")}
 
     def start_server(self, bind: str, port: int) -> None:
         start_http_server(port, addr=bind)
         logger.info("metrics server started at %s:%s", bind, port)
 
     def set_consecutive(self, typ: str, value: int) -> None:
-        self.consecutive_failures.labels(type=typ).set(value)
+        child = self._consecutive.get(typ)
+        if child is None:
+            child = self._consecutive[typ] = self.consecutive_failures.labels(type=typ)
+        child.set(value)
+
+    def set_consecutive_many(self, values: dict[str, int]) -> None:
+        for typ, value in values.items():
+            self.set_consecutive(typ, value)
 
 
 def write_status_json(path: Path, data: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     tmp.replace(path)
@@ -15,18 +15,35 @@ class MinIntervalLimiter:
     def __init__(self, min_interval_seconds: int, jitter_seconds: int) -> None:
         self._min_interval = float(max(0, min_interval_seconds))
         self._jitter = float(max(0, jitter_seconds))
-        self._lock = asyncio.Lock()
         self._state = RateLimitState()
+        # Latest defer() deadline; a waiter whose slot falls before it takes a new slot.
+        self._deferred_until = 0.0
 
     def next_allowed_in_seconds(self) -> float:
         now = time.monotonic()
         return max(0.0, self._state.next_allowed_monotonic - now)
 
+    def defer(self, seconds: float) -> None:
+        """Push the next allowed slot out to at least `seconds` from now (e.g. Retry-After)."""
+        if seconds <= 0:
+            return
+        until = time.monotonic() + seconds
+        if until > self._state.next_allowed_monotonic:
+            self._state.next_allowed_monotonic = until
+        if until > self._deferred_until:
+            self._deferred_until = until
+
     async def acquire(self) -> None:
-        async with self._lock:
+        # Reserve a slot and sleep until it without holding anything, so concurrent callers
+        # wait in parallel, FIFO, min_interval (+jitter) apart. Reserving never awaits and
+        # is therefore atomic on the event loop.
+        while True:
             now = time.monotonic()
-            wait_s = self._state.next_allowed_monotonic - now
-            if wait_s > 0:
-                await asyncio.sleep(wait_s)
+            slot = max(now, self._state.next_allowed_monotonic)
             jitter = random.uniform(0.0, self._jitter) if self._jitter else 0.0
-            self._state.next_allowed_monotonic = time.monotonic() + self._min_interval + jitter
+            self._state.next_allowed_monotonic = slot + self._min_interval + jitter
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # Only slots a defer() overtook are re-reserved; waiters wake in slot order, so they re-queue in order.
+            if slot >= self._deferred_until:
+                return
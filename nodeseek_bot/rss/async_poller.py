@@ -1,35 +1,67 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import AsyncIterator
 
 import feedparser
 import httpx
 
 from nodeseek_bot.storage.types import FeedItem
 from nodeseek_bot.rss.poller import _to_dt
-from nodeseek_bot.utils import collapse_ws
+from nodeseek_bot.rss.xml_feed import parse_feed_xml
+from nodeseek_bot.utils import collapse_ws, collapse_ws_inline
 
 
 logger = logging.getLogger(__name__)
 
 
 class AsyncRssPoller:
-    def __init__(self, rss_url: str, timeout_seconds: int = 20) -> None:
+    def __init__(self, rss_url: str, timeout_seconds: int = 20, user_agent: str | None = None) -> None:
         self._url = rss_url
         self._timeout = timeout_seconds
-        self._client = httpx.AsyncClient(timeout=httpx.Timeout(timeout_seconds))
+        headers = {"User-Agent": user_agent} if user_agent else None
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(timeout_seconds), headers=headers)
+        # Validators of the last fully consumed feed; an unchanged feed then answers 304.
+        self._etag: str | None = None
+        self._last_modified: str | None = None
 
     async def aclose(self) -> None:
         await self._client.aclose()
 
     async def poll(self) -> list[FeedItem]:
-        resp = await self._client.get(self._url)
+        return [item async for item in self.iter_poll()]
+
+    async def iter_poll(self) -> AsyncIterator[FeedItem]:
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        resp = await self._client.get(self._url, headers=headers)
+        if resp.status_code == 304:
+            logger.debug("rss not modified")
+            return
         resp.raise_for_status()
-        feed = feedparser.parse(resp.text)
+
+        async for item in self._iter_items(resp.content):
+            yield item
+
+        # Only after every item was handed out, so a poll that failed midway is retried in full.
+        self._etag = resp.headers.get("ETag")
+        self._last_modified = resp.headers.get("Last-Modified")
+
+    async def _iter_items(self, content: bytes) -> AsyncIterator[FeedItem]:
+        items = parse_feed_xml(content)
+        if items is not None:
+            for item in items:
+                yield item
+            return
+
+        feed = feedparser.parse(content)
         if getattr(feed, "bozo", 0):
             logger.warning("rss parse bozo=%s error=%s", feed.bozo, getattr(feed, "bozo_exception", None))
 
-        items: list[FeedItem] = []
         for entry in feed.entries:
             url = entry.get("link")
             title = entry.get("title")
@@ -38,13 +70,10 @@ class AsyncRssPoller:
             guid = entry.get("id") or entry.get("guid")
             published_at = _to_dt(entry)
             summary = entry.get("summary") or entry.get("description") or ""
-            items.append(
-                FeedItem(
-                    guid=str(guid) if guid else None,
-                    url=str(url),
-                    title=collapse_ws(str(title)),
-                    published_at=published_at,
-                    summary=collapse_ws(str(summary)),
-                )
+            yield FeedItem(
+                guid=str(guid) if guid else None,
+                url=str(url),
+                title=collapse_ws_inline(str(title)),
+                published_at=published_at,
+                summary=collapse_ws(str(summary)),
             )
-        return items
@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 import feedparser
 
 from nodeseek_bot.storage.types import FeedItem
-from nodeseek_bot.utils import collapse_ws
+from nodeseek_bot.utils import collapse_ws, collapse_ws_inline
 
 
 logger = logging.getLogger(__name__)
@@ -42,7 +42,7 @@ class RssPoller:
                 FeedItem(
                     guid=str(guid) if guid else None,
                     url=str(url),
-                    title=collapse_ws(str(title)),
+                    title=collapse_ws_inline(str(title)),
                     published_at=published_at,
                     summary=collapse_ws(str(summary)),
                 )
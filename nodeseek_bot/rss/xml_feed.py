@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from nodeseek_bot.storage.types import FeedItem
+from nodeseek_bot.utils import collapse_ws, collapse_ws_inline
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - optional accelerator
+    etree = None
+
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+
+# feedparser's sanitizer drops these elements with their bodies; keep them out of rules/AI input too.
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b[^>]*>.*?(?:</\1\s*>|\Z)", re.IGNORECASE | re.DOTALL)
+
+# Well-formed documents only: anything libxml2 would have to recover goes to feedparser.
+_PARSER = (
+    etree.XMLParser(recover=False, huge_tree=False, resolve_entities=False, no_network=True)
+    if etree is not None
+    else None
+)
+
+
+def _text(el) -> str:
+    if el is None:
+        return ""
+    return "".join(el.itertext())
+
+
+def _to_utc(dt: datetime) -> datetime:
+    # Match feedparser's time_struct: UTC, whole seconds.
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _rfc822(value: str) -> datetime | None:
+    try:
+        return _to_utc(parsedate_to_datetime(value.strip()))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _iso8601(value: str) -> datetime | None:
+    try:
+        return _to_utc(datetime.fromisoformat(value.strip()))
+    except ValueError:
+        return None
+
+
+def _item(guid: str, url: str, title: str, published_at: datetime | None, summary: str) -> FeedItem | None:
+    url = url.strip()
+    if not url or not title:
+        return None
+    return FeedItem(
+        guid=guid.strip() or None,
+        url=url,
+        title=collapse_ws_inline(title),
+        published_at=published_at,
+        summary=collapse_ws(_SCRIPT_STYLE_RE.sub("", summary) if "<" in summary else summary),
+    )
+
+
+def _rss_link(item) -> str:
+    link = item.findtext("link")
+    if link:
+        return link
+    # Like feedparser: a permalink guid stands in for a missing <link>.
+    guid = item.find("guid")
+    if guid is not None and guid.get("isPermaLink", "true").lower() != "false":
+        return guid.text or ""
+    return ""
+
+
+def _rss_items(channel) -> list[FeedItem]:
+    out: list[FeedItem] = []
+    for el in channel.iterfind("item"):
+        pub = el.findtext("pubDate")
+        dc_date = el.findtext(_DC_DATE)
+        published_at = _rfc822(pub) if pub else (_iso8601(dc_date) if dc_date else None)
+        item = _item(
+            guid=el.findtext("guid") or "",
+            url=_rss_link(el),
+            title=_text(el.find("title")),
+            published_at=published_at,
+            summary=el.findtext("description") or "",
+        )
+        if item is not None:
+            out.append(item)
+    return out
+
+
+def _atom_link(entry) -> str:
+    for link in entry.iterfind(f"{_ATOM}link"):
+        if link.get("rel", "alternate") == "alternate" and link.get("href"):
+            return link.get("href")
+    return ""
+
+
+def _atom_items(feed) -> list[FeedItem]:
+    out: list[FeedItem] = []
+    for el in feed.iterfind(f"{_ATOM}entry"):
+        stamp = el.findtext(f"{_ATOM}published") or el.findtext(f"{_ATOM}updated")
+        summary = el.find(f"{_ATOM}summary")
+        if summary is None:
+            summary = el.find(f"{_ATOM}content")
+        item = _item(
+            guid=el.findtext(f"{_ATOM}id") or "",
+            url=_atom_link(el),
+            title=_text(el.find(f"{_ATOM}title")),
+            published_at=_iso8601(stamp) if stamp else None,
+            summary=_text(summary),
+        )
+        if item is not None:
+            out.append(item)
+    return out
+
+
+def parse_feed_xml(content: bytes) -> list[FeedItem] | None:
+    """Parse a well-formed RSS 2.0 or Atom document with lxml.
+
+    Returns None when lxml is unavailable, the XML is malformed, or the document is some
+    other format; callers then fall back to feedparser.
+    """
+    if _PARSER is None or not content:
+        return None
+    try:
+        root = etree.fromstring(content, parser=_PARSER)
+    except etree.XMLSyntaxError:
+        return None
+
+    if root.tag == "rss":
+        channel = root.find("channel")
+        return _rss_items(channel) if channel is not None else None
+    if root.tag == f"{_ATOM}feed":
+        return _atom_items(root)
+    return None
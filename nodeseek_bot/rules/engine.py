@@ -3,6 +3,11 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional accelerator
+    ahocorasick = None
+
 from nodeseek_bot.storage.types import ScoreResult
 
 
@@ -16,7 +21,24 @@ class CompiledRules:
     keywords: dict
     length_rules: dict
     signals: dict
-    block_title_regex: list[re.Pattern]
+    block_title_regex: _PatternSet
+    # (signal, weight, patterns) for signals with a non-zero weight and at least one pattern
+    signal_regex: list[tuple[str, float, _PatternSet]]
+    # Keyword lists as (original, casefolded) pairs, matched in one pass by `keyword_matcher`.
+    blacklist: list[tuple[str, str]]
+    whitelist: list[tuple[str, str]]
+    # (category, weight, topic keywords) in `weights.category` order
+    categories: list[tuple[str, float, list[tuple[str, str]]]]
+    trash: list[str]
+    keyword_matcher: _KeywordMatcher
+    # Fold the post text with str.lower instead of str.casefold (opt-in, all keywords ASCII)
+    fold_lower: bool
+    min_effective_chars: int
+    very_short_chars: int
+    long_chars_bonus_threshold: int
+    # Penalty/bonus weights with their defaults applied
+    penalty: dict[str, float]
+    long_content_bonus: float
 
 
 _DEFAULT_EMPTY = {
@@ -27,6 +49,73 @@ _DEFAULT_EMPTY = {
 }
 
 
+_CLICKBAIT_RE = re.compile(r"(震惊|必看|不看后悔|速看|重磅)")
+_EMOTIONAL_RE = re.compile(r"(对线|别杠|喷|垃圾|傻|滚|引战)")
+_REPOST_RE = re.compile(r"(转载|搬运|转发)")
+
+
+class _KeywordMatcher:
+    """Find which of a fixed set of casefolded keywords occur in a text.
+
+    Uses one Aho-Corasick scan when pyahocorasick is installed, otherwise a substring
+    check per distinct keyword. The empty keyword always matches, like `"" in hay`.
+    """
+
+    def __init__(self, keywords: set[str]) -> None:
+        self._always = frozenset(k for k in keywords if not k)
+        self._keywords = sorted(k for k in keywords if k)
+        self._automaton = None
+        if ahocorasick is not None and self._keywords:
+            automaton = ahocorasick.Automaton()
+            for k in self._keywords:
+                automaton.add_word(k, k)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def matches(self, hay: str) -> set[str]:
+        found = set(self._always)
+        if self._automaton is not None:
+            found.update(k for _, k in self._automaton.iter(hay))
+        else:
+            found.update(k for k in self._keywords if k in hay)
+        return found
+
+
+# Numbered/named backreferences and conditionals would be renumbered or collide once
+# patterns are joined into one alternation.
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+class _PatternSet:
+    """Compiled patterns plus, when they can be safely joined, one alternation of all of them."""
+
+    def __init__(self, patterns: list[re.Pattern]) -> None:
+        self.patterns = patterns
+        self._any: re.Pattern | None = None
+        if len(patterns) > 1 and not any(_BACKREF_RE.search(p.pattern) for p in patterns):
+            try:
+                self._any = re.compile(
+                    "|".join(f"(?:{p.pattern})" for p in patterns), re.IGNORECASE | re.MULTILINE
+                )
+            except re.error:
+                self._any = None
+
+    def search_any(self, text: str) -> bool:
+        if self._any is not None:
+            return self._any.search(text) is not None
+        return any(p.search(text) for p in self.patterns)
+
+    def first_match(self, text: str) -> re.Pattern | None:
+        """First pattern in list order that matches (one scan when nothing does)."""
+        if not self.patterns or (self._any is not None and not self._any.search(text)):
+            return None
+        return next((p for p in self.patterns if p.search(text)), None)
+
+
+def _keyword_pairs(items) -> list[tuple[str, str]]:
+    return [(str(x), str(x).casefold()) for x in items or []]
+
+
 def _compile_patterns(patterns: list[str]) -> list[re.Pattern]:
     out: list[re.Pattern] = []
     for p in patterns:
@@ -54,7 +143,46 @@ class RuleEngine:
         keywords = rules.get("keywords", _DEFAULT_EMPTY) or _DEFAULT_EMPTY
         length_rules = rules.get("length_rules", {})
         signals = rules.get("signals", {})
-        block_title_regex = _compile_patterns((rules.get("block_title_regex") or []))
+        block_title_regex = _PatternSet(_compile_patterns((rules.get("block_title_regex") or [])))
+
+        sig_weights = weights.get("signals") or {}
+        signal_regex: list[tuple[str, float, _PatternSet]] = []
+        for sig, conf in (signals or {}).items():
+            patterns = conf.get("any_regex") if isinstance(conf, dict) else None
+            weight = float(sig_weights.get(sig, 0))
+            # A zero-weight signal never contributes, so it is not worth scanning for.
+            if patterns and weight:
+                signal_regex.append((sig, weight, _PatternSet(_compile_patterns([str(p) for p in patterns]))))
+
+        blacklist = [(kw, cf) for kw, cf in _keyword_pairs(keywords.get("blacklist")) if kw]
+        whitelist = [(kw, cf) for kw, cf in _keyword_pairs(keywords.get("whitelist")) if kw]
+        topic_lists = keywords.get("topics", {}) or {}
+        categories = [
+            (cat, float(weight), _keyword_pairs(topic_lists.get(cat)))
+            for cat, weight in (weights.get("category") or {}).items()
+        ]
+        trash = [cf for _, cf in _keyword_pairs(keywords.get("trash"))]
+
+        all_keywords = {cf for _, cf in blacklist} | {cf for _, cf in whitelist} | set(trash)
+        for _, _, pairs in categories:
+            all_keywords.update(cf for _, cf in pairs)
+
+        # casefold also rewrites a few non-ASCII letters into ASCII (e.g. "ß" -> "ss"), so
+        # lower() is only used for non-ASCII text when the rules explicitly opt in.
+        fold_lower = not rules.get("keyword_casefold", True) and all(k.isascii() for k in all_keywords)
+
+        penalties = weights.get("penalties") or {}
+        penalty = {
+            name: float(penalties.get(name, default))
+            for name, default in (
+                ("too_short", -8),
+                ("pure_help_no_context", -7),
+                ("clickbait", -8),
+                ("emotional_or_quarrel", -10),
+                ("repeated_or_repost_hint", -6),
+                ("rss_only_penalty", -4),
+            )
+        }
 
         return CompiledRules(
             raw=rules,
@@ -66,21 +194,33 @@ class RuleEngine:
             length_rules=length_rules,
             signals=signals,
             block_title_regex=block_title_regex,
+            signal_regex=signal_regex,
+            blacklist=blacklist,
+            whitelist=whitelist,
+            categories=categories,
+            trash=trash,
+            keyword_matcher=_KeywordMatcher(all_keywords),
+            fold_lower=fold_lower,
+            min_effective_chars=int(length_rules.get("min_effective_chars", 180)),
+            very_short_chars=int(length_rules.get("very_short_chars", 80)),
+            long_chars_bonus_threshold=int(length_rules.get("long_chars_bonus_threshold", 1200)),
+            penalty=penalty,
+            long_content_bonus=float((weights.get("bonuses") or {}).get("long_content", 0)),
         )
 
     def score(self, title: str, text: str, source_confidence: str) -> ScoreResult:
         c = self._compiled
         title = title or ""
         text = text or ""
-        hay = (title + "\n" + text).casefold()
+        hay = title + "\n" + text
+        # For ASCII text lower() is exactly casefold(), and cheaper.
+        hay = hay.lower() if c.fold_lower or hay.isascii() else hay.casefold()
+        found = c.keyword_matcher.matches(hay)
 
         contributions: list[dict] = []
 
-        whitelist = [str(x) for x in c.keywords.get("whitelist", [])]
-        blacklist = [str(x) for x in c.keywords.get("blacklist", [])]
-
-        for kw in blacklist:
-            if kw and kw.casefold() in hay:
+        for kw, cf in c.blacklist:
+            if cf in found:
                 explain = {
                     "decision": "BLACKLIST",
                     "reason": f"blacklist keyword: {kw}",
@@ -89,17 +229,17 @@ class RuleEngine:
                 }
                 return ScoreResult(score_total=-999, decision="BLACKLIST", explain=explain)
 
-        for pat in c.block_title_regex:
-            if pat.search(title or ""):
-                explain = {
-                    "decision": "BLACKLIST",
-                    "reason": f"blocked by title regex: {pat.pattern}",
-                    "threshold": c.score_threshold,
-                }
-                return ScoreResult(score_total=-999, decision="BLACKLIST", explain=explain)
-
-        for kw in whitelist:
-            if kw and kw.casefold() in hay:
+        pat = c.block_title_regex.first_match(title)
+        if pat is not None:
+            explain = {
+                "decision": "BLACKLIST",
+                "reason": f"blocked by title regex: {pat.pattern}",
+                "threshold": c.score_threshold,
+            }
+            return ScoreResult(score_total=-999, decision="BLACKLIST", explain=explain)
+
+        for kw, cf in c.whitelist:
+            if cf in found:
                 contributions.append({"name": "whitelist", "score": 999, "reason": f"{kw}"})
                 explain = {
                     "decision": "WHITELIST",
@@ -111,70 +251,52 @@ class RuleEngine:
         raw_score = 0.0
 
         # Category keywords
-        cat_weights = (c.weights.get("category") or {}).copy()
-        topics = c.keywords.get("topics", {}) or {}
-        for cat, weight in cat_weights.items():
-            kw_list = topics.get(cat) or []
-            hit = None
-            for kw in kw_list:
-                if str(kw).casefold() in hay:
-                    hit = str(kw)
-                    break
+        for cat, s, pairs in c.categories:
+            hit = next((kw for kw, cf in pairs if cf in found), None)
             if hit:
-                s = float(weight)
                 raw_score += s
                 contributions.append({"name": f"category.{cat}", "score": s, "reason": hit})
 
         # Signals by regex
-        sig_weights = (c.weights.get("signals") or {}).copy()
-        for sig, conf in (c.signals or {}).items():
-            patterns = conf.get("any_regex") if isinstance(conf, dict) else None
-            if not patterns:
-                continue
-            compiled = _compile_patterns([str(p) for p in patterns])
-            if any(p.search(title) or p.search(text) for p in compiled):
-                s = float(sig_weights.get(sig, 0))
-                if s:
-                    raw_score += s
-                    contributions.append({"name": f"signal.{sig}", "score": s, "reason": "matched"})
+        for sig, s, pattern_set in c.signal_regex:
+            if pattern_set.search_any(title) or pattern_set.search_any(text):
+                raw_score += s
+                contributions.append({"name": f"signal.{sig}", "score": s, "reason": "matched"})
 
         # Length rules
-        min_effective = int(c.length_rules.get("min_effective_chars", 180))
-        very_short = int(c.length_rules.get("very_short_chars", 80))
-        long_threshold = int(c.length_rules.get("long_chars_bonus_threshold", 1200))
+        very_short = c.very_short_chars
+        long_threshold = c.long_chars_bonus_threshold
 
         eff_len = len(text.strip())
         if eff_len < very_short:
-            penalty = float((c.weights.get("penalties") or {}).get("too_short", -8))
+            penalty = c.penalty["too_short"]
             raw_score += penalty
             contributions.append({"name": "penalty.too_short", "score": penalty, "reason": f"len<{very_short}"})
 
         if eff_len >= long_threshold:
-            bonus = float((c.weights.get("bonuses") or {}).get("long_content", 0))
+            bonus = c.long_content_bonus
             if bonus:
                 raw_score += bonus
                 contributions.append({"name": "bonus.long_content", "score": bonus, "reason": f"len>={long_threshold}"})
 
         # Low-value patterns
-        penalties = c.weights.get("penalties") or {}
-        help_words = (c.keywords.get("trash") or [])
-        if any(str(w).casefold() in hay for w in help_words) and eff_len < min_effective:
-            p = float(penalties.get("pure_help_no_context", -7))
+        if eff_len < c.min_effective_chars and any(cf in found for cf in c.trash):
+            p = c.penalty["pure_help_no_context"]
             raw_score += p
             contributions.append({"name": "penalty.pure_help_no_context", "score": p, "reason": "help/trash keywords"})
 
-        if re.search(r"(震惊|必看|不看后悔|速看|重磅)", title):
-            p = float(penalties.get("clickbait", -8))
+        if _CLICKBAIT_RE.search(title):
+            p = c.penalty["clickbait"]
             raw_score += p
             contributions.append({"name": "penalty.clickbait", "score": p, "reason": "title pattern"})
 
-        if re.search(r"(对线|别杠|喷|垃圾|傻|滚|引战)", hay):
-            p = float(penalties.get("emotional_or_quarrel", -10))
+        if _EMOTIONAL_RE.search(hay):
+            p = c.penalty["emotional_or_quarrel"]
             raw_score += p
             contributions.append({"name": "penalty.emotional_or_quarrel", "score": p, "reason": "emotional words"})
 
-        if re.search(r"(转载|搬运|转发)", hay):
-            p = float(penalties.get("repeated_or_repost_hint", -6))
+        if _REPOST_RE.search(hay):
+            p = c.penalty["repeated_or_repost_hint"]
             raw_score += p
             contributions.append({"name": "penalty.repost", "score": p, "reason": "repost hint"})
 
@@ -184,7 +306,7 @@ class RuleEngine:
 
         rss_only_penalty = 0.0
         if source_confidence == "RSS_ONLY":
-            rss_only_penalty = float(penalties.get("rss_only_penalty", -4))
+            rss_only_penalty = c.penalty["rss_only_penalty"]
             score_total += rss_only_penalty
             contributions.append({"name": "penalty.rss_only", "score": rss_only_penalty, "reason": "RSS_ONLY"})
 
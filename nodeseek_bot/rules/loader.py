@@ -4,53 +4,130 @@ import copy
 from pathlib import Path
 import yaml
 
+try:
+    # libyaml-backed; same safe subset as yaml.safe_load/safe_dump.
+    from yaml import CSafeDumper as _SafeDumper, CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeDumper as _SafeDumper, SafeLoader as _SafeLoader
 
-def load_yaml(path: Path) -> dict:
-    if not path.exists():
-        return {}
+
+def _parse_yaml(path: Path) -> dict:
     with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
+        data = yaml.load(f, Loader=_SafeLoader) or {}
     if not isinstance(data, dict):
         raise ValueError(f"rules yaml must be a mapping: {path}")
     return data
 
 
+def load_yaml(path: Path) -> dict:
+    """Parsed YAML mapping at `path` ({} if missing); the caller owns the returned dict."""
+    data = _load_yaml_shared(path)
+    return copy.deepcopy(data) if data else {}
+
+
+# YAML scalars: safe to share between the inputs and the merged result.
+_SCALARS = (str, int, float, bool)
+
+
+def _copy_value(v):
+    return v if isinstance(v, _SCALARS) else copy.deepcopy(v)
+
+
+def _merge_lists(base: list, override: list) -> list:
+    # keep order, unique (by str(), so 1 and "1" count as the same item)
+    seen: set[str] = set()
+    merged = []
+    for items in (base, override):
+        for item in items:
+            key = str(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return merged
+
+
 def deep_merge(base: dict, override: dict) -> dict:
-    out = copy.deepcopy(base)
-    for k, v in override.items():
-        if v is None:
-            continue
-        if k not in out:
-            out[k] = copy.deepcopy(v)
-            continue
-        if isinstance(out[k], dict) and isinstance(v, dict):
-            out[k] = deep_merge(out[k], v)
-            continue
-        if isinstance(out[k], list) and isinstance(v, list):
-            # keep order, unique
-            seen = set()
-            merged = []
-            for item in out[k] + v:
-                key = str(item)
-                if key in seen:
-                    continue
-                seen.add(key)
-                merged.append(item)
-            out[k] = merged
-            continue
-        out[k] = copy.deepcopy(v)
+    """Merge `override` onto `base` without modifying either.
+
+    Containers along overridden paths are rebuilt and override containers are copied;
+    subtrees only present in `base` are shared with the result.
+    """
+    out = {}
+    for k, v in base.items():
+        ov = override.get(k)
+        if ov is None:
+            out[k] = v
+        elif isinstance(v, dict) and isinstance(ov, dict):
+            out[k] = deep_merge(v, ov)
+        elif isinstance(v, list) and isinstance(ov, list):
+            out[k] = _merge_lists(v, ov)
+        else:
+            out[k] = _copy_value(ov)
+    for k, ov in override.items():
+        if ov is not None and k not in base:
+            out[k] = _copy_value(ov)
     return out
 
 
+# (path, st_mtime_ns, st_size); None when the file does not exist.
+_StatKey = tuple[Path, int, int] | None
+
+# Last merged result of load_rules, keyed on the stat keys of both files.
+_rules_cache: tuple[tuple[_StatKey, _StatKey], dict] | None = None
+
+
+def _stat_key(path: Path) -> _StatKey:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+# path -> (stat key, parsed mapping); the mappings are shared and never mutated.
+_yaml_cache: dict[Path, tuple[_StatKey, dict]] = {}
+
+
+def _load_yaml_shared(path: Path) -> dict:
+    key = _stat_key(path)
+    if key is None:
+        _yaml_cache.pop(path, None)
+        return {}
+    hit = _yaml_cache.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    data = _parse_yaml(path)
+    _yaml_cache[path] = (key, data)
+    return data
+
+
 def load_rules(base_path: Path, overrides_path: Path) -> dict:
-    base = load_yaml(base_path)
-    overrides = load_yaml(overrides_path)
-    return deep_merge(base, overrides)
+    """Load and merge the rules files, reusing the last result while neither file changed.
+
+    The returned dict is shared between calls and must be treated as read-only.
+    """
+    global _rules_cache
+    key = (_stat_key(base_path), _stat_key(overrides_path))
+    if _rules_cache is not None and _rules_cache[0] == key:
+        return _rules_cache[1]
+
+    # Shared parses: deep_merge never modifies its inputs, and only overridden paths are copied.
+    # Editing just the overrides file then skips re-parsing the base rules.
+    base = _load_yaml_shared(base_path)
+    overrides = _load_yaml_shared(overrides_path)
+    merged = deep_merge(base, overrides)
+    _rules_cache = (key, merged)
+    return merged
 
 
 def save_overrides(path: Path, data: dict) -> None:
+    global _rules_cache
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
     with tmp.open("w", encoding="utf-8") as f:
-        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+        yaml.dump(data, f, Dumper=_SafeDumper, allow_unicode=True, sort_keys=False)
     tmp.replace(path)
+    # A rewrite within the filesystem's mtime granularity could keep the same stat key.
+    _yaml_cache.pop(path, None)
+    _rules_cache = None
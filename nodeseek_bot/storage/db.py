@@ -1,18 +1,22 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+from array import array
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
 import aiosqlite
+import orjson
 
 from nodeseek_bot.storage.schema import SCHEMA_SQL
 from nodeseek_bot.storage.types import (
     ContentResult,
     FeedItem,
     FetchAttempt,
+    PostHeader,
     PostRow,
     ScoreResult,
     SummaryResult,
@@ -40,6 +44,37 @@ CONF_RSS_ONLY = "RSS_ONLY"
 CONF_FULLTEXT_HTTP = "FULLTEXT_HTTP"
 CONF_FULLTEXT_BROWSER = "FULLTEXT_BROWSER"
 
+# Connection-local settings, so they are applied on every connect rather than in SCHEMA_SQL.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",  # KiB, i.e. ~20 MB of page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA wal_autocheckpoint=1000",
+)
+
+# PostRow field order; named so a schema migration appending columns cannot shift them.
+_POST_COLUMNS = (
+    "id, guid, url, url_hash, title, published_at, rss_summary, status, source_confidence, created_at, updated_at"
+)
+# Same order with rss_summary left out, for listings that only show title/url.
+_POST_LIST_COLUMNS = _POST_COLUMNS.replace("rss_summary", "NULL")
+
+# A fingerprint seen more recently than this is not rewritten on the next poll; retention
+# is counted in days, so the skipped touch never matters.
+_FINGERPRINT_TOUCH_SECONDS = 60
+
+# Rows per cleanup statement/commit, bounding how long one cleanup step holds the write lock.
+_CLEANUP_CHUNK = 500
+
+# Read-only connections for SELECT-only methods; WAL lets them run alongside the writer.
+_READER_CONNECTIONS = 4
+
+def _dumps(value: object) -> str:
+    # TEXT columns; orjson writes UTF-8 as-is, like json.dumps(ensure_ascii=False).
+    return orjson.dumps(value).decode()
+
+
 _TERMINAL_STATUSES = {
     STATUS_FETCHED,
     STATUS_SUMMARIZED,
@@ -48,12 +83,60 @@ _TERMINAL_STATUSES = {
     STATUS_IGNORED,
 }
 
+# A guid match wins and also moves url/url_hash; otherwise a url_hash match is refreshed
+# (guid kept); otherwise a NEW row is inserted. Two ON CONFLICT clauses need SQLite >= 3.35.
+_UPSERT_POST_SQL = (
+    "INSERT INTO posts(guid, url, url_hash, title, published_at, rss_summary, status, source_confidence, created_at, updated_at) "
+    "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(guid) WHERE guid IS NOT NULL DO UPDATE SET url=excluded.url, url_hash=excluded.url_hash, title=excluded.title, published_at=excluded.published_at, rss_summary=excluded.rss_summary, updated_at=excluded.updated_at "
+    "ON CONFLICT(url_hash) DO UPDATE SET url=excluded.url, title=excluded.title, published_at=excluded.published_at, rss_summary=excluded.rss_summary, updated_at=excluded.updated_at"
+)
+
+
+def _resolve_upserted_ids(
+    keyed: list[tuple[FeedItem, str, str]], existing: list[tuple[int, str | None, str]]
+) -> list[int]:
+    """Replay _UPSERT_POST_SQL over the pre-batch rows to find each item's post id.
+
+    An item that inserts a new row gets the placeholder -(its index + 1), shared by later
+    items that hit the same row; the real id is looked up after the insert.
+    """
+    by_guid = {guid: pid for pid, guid, _ in existing if guid is not None}
+    by_hash = {url_hash: pid for pid, _, url_hash in existing}
+    hash_of = {pid: url_hash for pid, _, url_hash in existing}
+    ids: list[int] = []
+    for n, (item, _, url_hash) in enumerate(keyed):
+        pid = by_guid.get(item.guid) if item.guid is not None else None
+        if pid is not None:
+            old = hash_of[pid]
+            if by_hash.get(old) == pid:
+                del by_hash[old]
+        else:
+            pid = by_hash.get(url_hash)
+            if pid is None:
+                pid = -(n + 1)
+                if item.guid is not None:
+                    by_guid[item.guid] = pid
+        by_hash[url_hash] = pid
+        hash_of[pid] = url_hash
+        ids.append(pid)
+    return ids
+
 
 class Storage:
     def __init__(self, sqlite_path: Path):
         self._path = sqlite_path
         self._db: aiosqlite.Connection | None = None
+        # Guards the writer connection (_db) only; reads go through the reader pool.
         self._lock = asyncio.Lock()
+        self._reader_conns: list[aiosqlite.Connection] = []
+        self._readers: asyncio.Queue[aiosqlite.Connection] | None = None
+        # Task currently inside transaction(); its writes skip the per-call commit.
+        self._tx_task: asyncio.Task | None = None
+        # Bumped whenever labeled scores may change, so callers can cache derived values.
+        self.labels_version = 0
+        # Mirror of deliveries(post_id, target_chat_id); this process is its only writer.
+        self._delivered: set[tuple[int, int]] = set()
 
     async def _ensure_columns(self) -> None:
         """Best-effort migrations for existing DBs."""
@@ -77,13 +160,39 @@ class Storage:
 
     async def connect(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._db = await aiosqlite.connect(self._path.as_posix())
+        # Implicit transactions start as BEGIN IMMEDIATE: each write method takes the write
+        # lock up front instead of upgrading a deferred read (and risking SQLITE_BUSY).
+        self._db = await aiosqlite.connect(self._path.as_posix(), isolation_level="IMMEDIATE")
         self._db.row_factory = aiosqlite.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            await self._db.execute(pragma)
         await self._db.executescript(SCHEMA_SQL)
         await self._db.commit()
         await self._ensure_columns()
+        await self._load_deliveries()
+        await self._open_readers()
+
+    async def _open_readers(self) -> None:
+        # Opened after the schema exists, since a read-only connection cannot create it.
+        uri = f"{self._path.resolve().as_uri()}?mode=ro"
+        self._readers = asyncio.Queue()
+        for _ in range(_READER_CONNECTIONS):
+            conn = await aiosqlite.connect(uri, uri=True)
+            conn.row_factory = aiosqlite.Row
+            for pragma in _CONNECTION_PRAGMAS:
+                await conn.execute(pragma)
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+
+    async def _load_deliveries(self) -> None:
+        cursor = await self._conn().execute("SELECT post_id, target_chat_id FROM deliveries")
+        rows = await cursor.fetchall()
+        self._delivered = {(int(r[0]), int(r[1])) for r in rows}
 
     async def close(self) -> None:
+        readers, self._reader_conns, self._readers = self._reader_conns, [], None
+        for conn in readers:
+            await conn.close()
         if self._db is not None:
             await self._db.close()
             self._db = None
@@ -93,132 +202,199 @@ class Storage:
             raise RuntimeError("storage not connected")
         return self._db
 
-    async def upsert_from_feed(self, item: FeedItem) -> int:
+    @asynccontextmanager
+    async def _guard(self) -> AsyncIterator[None]:
+        # The transaction owner already holds the lock; everyone else takes it per call.
+        if self._tx_task is not None and self._tx_task is asyncio.current_task():
+            yield
+            return
         async with self._lock:
-            return await self._upsert_from_feed_locked(item)
-
-    async def _upsert_from_feed_locked(self, item: FeedItem) -> int:
-        url = canonicalize_url(item.url)
-        url_hash = sha256_hex(url)
-        now = now_utc().isoformat()
-
-        conn = self._conn()
-
-        await conn.execute(
-            "INSERT INTO fingerprints(url_hash, last_seen_at) VALUES(?, ?) "
-            "ON CONFLICT(url_hash) DO UPDATE SET last_seen_at=excluded.last_seen_at",
-            (url_hash, now),
-        )
+            yield
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        # Inside transaction() read through the writer, so the block sees its own uncommitted rows.
+        if self._tx_task is not None and self._tx_task is asyncio.current_task():
+            yield self._conn()
+            return
+        if self._readers is None:
+            raise RuntimeError("storage not connected")
+        readers = self._readers
+        conn = await readers.get()
+        try:
+            yield conn
+        finally:
+            readers.put_nowait(conn)
+
+    async def _commit(self) -> None:
+        if self._tx_task is None:
+            await self._conn().commit()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Run several storage calls under one lock hold and a single commit.
+
+        Rolls back if the block raises. The lock is held throughout, so keep network calls
+        out of the block.
+        """
+        if self._tx_task is not None and self._tx_task is asyncio.current_task():
+            yield
+            return
+        async with self._lock:
+            self._tx_task = asyncio.current_task()
+            try:
+                yield
+            except BaseException:
+                await self._conn().rollback()
+                await self._load_deliveries()
+                raise
+            else:
+                await self._conn().commit()
+            finally:
+                self._tx_task = None
 
-        if item.guid:
-            cursor = await conn.execute(
-                "SELECT id FROM posts WHERE guid=?",
-                (item.guid,),
-            )
-            row = await cursor.fetchone()
-            if row is not None:
-                await conn.execute(
-                    "UPDATE posts SET url=?, url_hash=?, title=?, published_at=?, rss_summary=?, updated_at=? WHERE id=?",
-                    (
-                        url,
-                        url_hash,
-                        item.title,
-                        item.published_at.isoformat() if item.published_at else None,
-                        item.summary,
-                        now,
-                        row["id"],
-                    ),
+    async def upsert_from_feed(self, item: FeedItem) -> int:
+        return (await self.upsert_from_feed_many([item]))[0]
+
+    async def upsert_from_feed_many(self, items: list[FeedItem]) -> list[int]:
+        """Upsert a whole RSS poll in one transaction; returns post ids in input order."""
+        if not items:
+            return []
+        # Pure CPU; done before taking the lock so it never delays other storage calls.
+        now_dt = now_utc()
+        now = now_dt.isoformat()
+        touch_before = (now_dt - timedelta(seconds=_FINGERPRINT_TOUCH_SECONDS)).isoformat()
+        keyed = []
+        for item in items:
+            url = canonicalize_url(item.url)
+            keyed.append((item, url, sha256_hex(url)))
+        async with self._guard():
+            conn = self._conn()
+            try:
+                await conn.executemany(
+                    "INSERT INTO fingerprints(url_hash, last_seen_at) VALUES(?, ?) "
+                    "ON CONFLICT(url_hash) DO UPDATE SET last_seen_at=excluded.last_seen_at "
+                    "WHERE fingerprints.last_seen_at < ?",
+                    [(url_hash, now, touch_before) for _, _, url_hash in keyed],
                 )
-                await conn.commit()
-                return int(row["id"])
-
-        cursor = await conn.execute(
-            "SELECT id FROM posts WHERE url_hash=?",
-            (url_hash,),
-        )
-        row = await cursor.fetchone()
-        if row is not None:
-            await conn.execute(
-                "UPDATE posts SET url=?, title=?, published_at=?, rss_summary=?, updated_at=? WHERE id=?",
-                (
-                    url,
-                    item.title,
-                    item.published_at.isoformat() if item.published_at else None,
-                    item.summary,
-                    now,
-                    row["id"],
-                ),
-            )
-            await conn.commit()
-            return int(row["id"])
-
-        await conn.execute(
-            "INSERT INTO posts(guid, url, url_hash, title, published_at, rss_summary, status, source_confidence, created_at, updated_at) "
-            "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                item.guid,
-                url,
-                url_hash,
-                item.title,
-                item.published_at.isoformat() if item.published_at else None,
-                item.summary,
-                STATUS_NEW,
-                CONF_RSS_ONLY,
-                now,
-                now,
-            ),
-        )
-        cursor = await conn.execute("SELECT last_insert_rowid() AS id")
-        row = await cursor.fetchone()
-        await conn.commit()
-        return int(row["id"])
+                guids = list({item.guid for item, _, _ in keyed if item.guid is not None})
+                hashes = list({url_hash for _, _, url_hash in keyed})
+                before = await self._select_post_keys_locked(guids, hashes)
+                await conn.executemany(
+                    _UPSERT_POST_SQL,
+                    [
+                        (
+                            item.guid,
+                            url,
+                            url_hash,
+                            item.title,
+                            item.published_at.isoformat() if item.published_at else None,
+                            item.summary,
+                            STATUS_NEW,
+                            CONF_RSS_ONLY,
+                            now,
+                            now,
+                        )
+                        for item, url, url_hash in keyed
+                    ],
+                )
+                ids = _resolve_upserted_ids(keyed, before)
+                if any(pid < 0 for pid in ids):
+                    after = await self._select_post_keys_locked(guids, hashes)
+                    by_guid = {guid: pid for pid, guid, _ in after if guid is not None}
+                    by_hash = {url_hash: pid for pid, _, url_hash in after}
+                    for n, pid in enumerate(ids):
+                        if pid < 0:
+                            # Found via the item that inserted the row: a guid never changes, and a
+                            # row without one is never moved to another url_hash.
+                            item, _, url_hash = keyed[-pid - 1]
+                            ids[n] = by_guid[item.guid] if item.guid is not None else by_hash[url_hash]
+                await self._commit()
+            except Exception:
+                if self._tx_task is None:
+                    await conn.rollback()
+                raise
+            return ids
+
+    async def _select_post_keys_locked(self, guids: list[str], hashes: list[str]) -> list[tuple[int, str | None, str]]:
+        """(id, guid, url_hash) of posts matching any of the guids or url hashes."""
+        sql = f"SELECT id, guid, url_hash FROM posts WHERE url_hash IN ({','.join('?' * len(hashes))})"
+        if guids:
+            sql += f" OR guid IN ({','.join('?' * len(guids))})"
+        async with self._conn().execute(sql, (*hashes, *guids)) as cursor:
+            rows = await cursor.fetchall()
+        return [(int(r[0]), r[1], r[2]) for r in rows]
 
     async def get_post(self, post_id: int) -> PostRow | None:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
-                "SELECT * FROM posts WHERE id=?",
+        async with self._reader() as conn:
+            async with conn.execute(
+                f"SELECT {_POST_COLUMNS} FROM posts WHERE id=?",
                 (post_id,),
-            )
-            row = await cursor.fetchone()
+            ) as cursor:
+                row = await cursor.fetchone()
             if row is None:
                 return None
-            return PostRow(**dict(row))
+            return PostRow(*row)
+
+    async def get_post_header(self, post_id: int) -> PostHeader | None:
+        """Existence/state check that never touches the post's title or summary text."""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT id, status, url_hash, updated_at FROM posts WHERE id=?",
+                (post_id,),
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            return PostHeader(*row)
 
     async def list_recent_posts(self, limit: int = 10) -> list[PostRow]:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
-                "SELECT * FROM posts ORDER BY created_at DESC LIMIT ?",
+        """Newest posts first; rss_summary is not loaded and is always None."""
+        async with self._reader() as conn:
+            async with conn.execute(
+                f"SELECT {_POST_LIST_COLUMNS} FROM posts ORDER BY created_at DESC LIMIT ?",
                 (limit,),
-            )
-            rows = await cursor.fetchall()
-            return [PostRow(**dict(r)) for r in rows]
+            ) as cursor:
+                rows = await cursor.fetchall()
+            return [PostRow(*r) for r in rows]
+
+    async def list_recent_posts_with_scores(self, limit: int = 10) -> list[tuple[PostRow, float | None, str | None]]:
+        """Like list_recent_posts, with each post's (score_total, decision), or Nones if unscored."""
+        async with self._reader() as conn:
+            async with conn.execute(
+                "SELECT p.*, s.score_total, s.decision "
+                f"FROM (SELECT {_POST_LIST_COLUMNS} FROM posts ORDER BY created_at DESC LIMIT ?) p "
+                "LEFT JOIN scores s ON s.post_id=p.id ORDER BY p.created_at DESC",
+                (limit,),
+            ) as cursor:
+                rows = await cursor.fetchall()
+            return [(PostRow(*r[:-2]), r[-2], r[-1]) for r in rows]
 
     async def take_next_for_processing(self) -> int | None:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
-                "SELECT id FROM posts WHERE status IN (?, ?) ORDER BY updated_at ASC LIMIT 1",
-                (STATUS_NEW, STATUS_FAILED),
-            )
-            row = await cursor.fetchone()
+        async with self._reader() as conn:
+            # Literal statuses: a partial index is only usable when its WHERE is provably implied.
+            # Without INDEXED BY the planner prefers ix_posts_status_updated_at plus a sort.
+            async with conn.execute(
+                f"SELECT id FROM posts INDEXED BY ix_posts_pending WHERE status IN ('{STATUS_NEW}', '{STATUS_FAILED}') "
+                "ORDER BY updated_at ASC LIMIT 1"
+            ) as cursor:
+                row = await cursor.fetchone()
             if row is None:
                 return None
             return int(row["id"])
 
     async def set_status(self, post_id: int, status: str) -> None:
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
             await conn.execute(
                 "UPDATE posts SET status=?, updated_at=? WHERE id=?",
                 (status, now, post_id),
             )
-            await conn.commit()
+            await self._commit()
 
     async def save_content(self, post_id: int, result: ContentResult) -> None:
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
             await conn.execute(
@@ -232,30 +408,31 @@ class Storage:
                     result.content_hash,
                     result.content_len,
                     result.fetched_at.isoformat() if result.fetched_at else None,
-                    json.dumps(result.image_urls or [], ensure_ascii=False),
+                    _dumps(result.image_urls or []),
                 ),
             )
+            # Already in this state: leave the row (and its page) unwritten.
             await conn.execute(
-                "UPDATE posts SET status=?, source_confidence=?, updated_at=? WHERE id=?",
-                (STATUS_FETCHED, result.source_confidence, now, post_id),
+                "UPDATE posts SET status=?, source_confidence=?, updated_at=? "
+                "WHERE id=? AND (status != ? OR source_confidence != ?)",
+                (STATUS_FETCHED, result.source_confidence, now, post_id, STATUS_FETCHED, result.source_confidence),
             )
-            await conn.commit()
+            await self._commit()
 
     async def load_content(self, post_id: int) -> ContentResult | None:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
+        async with self._reader() as conn:
+            async with conn.execute(
                 "SELECT c.content_text, c.content_html, c.content_hash, c.content_len, c.fetched_at, c.image_urls_json, p.source_confidence "
                 "FROM contents c JOIN posts p ON p.id=c.post_id WHERE c.post_id=?",
                 (post_id,),
-            )
-            row = await cursor.fetchone()
+            ) as cursor:
+                row = await cursor.fetchone()
             if row is None:
                 return None
             fetched_at = datetime.fromisoformat(row["fetched_at"]) if row["fetched_at"] else None
             row_dict = dict(row)
             image_urls_raw = row_dict.get("image_urls_json")
-            image_urls = json.loads(image_urls_raw) if image_urls_raw else []
+            image_urls = orjson.loads(image_urls_raw) if image_urls_raw else []
             return ContentResult(
                 content_text=row["content_text"],
                 content_html=row_dict.get("content_html"),
@@ -267,28 +444,36 @@ class Storage:
             )
 
     async def add_fetch_attempt(self, post_id: int, attempt_no: int, attempt: FetchAttempt) -> None:
-        async with self._lock:
+        await self.add_fetch_attempts(post_id, [attempt], start=attempt_no)
+
+    async def add_fetch_attempts(self, post_id: int, attempts: list[FetchAttempt], start: int = 1) -> None:
+        if not attempts:
+            return
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
-            await conn.execute(
+            await conn.executemany(
                 "INSERT INTO fetch_attempts(post_id, attempt_no, method, ok, http_status, error_type, error_detail, duration_ms, created_at) "
                 "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (
-                    post_id,
-                    attempt_no,
-                    attempt.method,
-                    1 if attempt.ok else 0,
-                    attempt.http_status,
-                    attempt.error_type,
-                    attempt.error_detail,
-                    attempt.duration_ms,
-                    now,
-                ),
+                [
+                    (
+                        post_id,
+                        attempt_no,
+                        attempt.method,
+                        1 if attempt.ok else 0,
+                        attempt.http_status,
+                        attempt.error_type,
+                        attempt.error_detail,
+                        attempt.duration_ms,
+                        now,
+                    )
+                    for attempt_no, attempt in enumerate(attempts, start=start)
+                ],
             )
-            await conn.commit()
+            await self._commit()
 
     async def save_summary(self, post_id: int, summary: SummaryResult) -> None:
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
             await conn.execute(
@@ -300,35 +485,34 @@ class Storage:
                     summary.model,
                     summary.prompt_version,
                     summary.summary_text,
-                    json.dumps(summary.key_points, ensure_ascii=False),
-                    json.dumps(summary.actions, ensure_ascii=False),
-                    json.dumps(summary.image_summaries or [], ensure_ascii=False),
+                    _dumps(summary.key_points),
+                    _dumps(summary.actions),
+                    _dumps(summary.image_summaries or []),
                     summary.token_in,
                     summary.token_out,
                     now,
                 ),
             )
             await conn.execute(
-                "UPDATE posts SET status=?, updated_at=? WHERE id=?",
-                (STATUS_SUMMARIZED, now, post_id),
+                "UPDATE posts SET status=?, updated_at=? WHERE id=? AND status != ?",
+                (STATUS_SUMMARIZED, now, post_id, STATUS_SUMMARIZED),
             )
-            await conn.commit()
+            await self._commit()
 
     async def load_summary(self, post_id: int) -> SummaryResult | None:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
+        async with self._reader() as conn:
+            async with conn.execute(
                 "SELECT * FROM ai_summaries WHERE post_id=?",
                 (post_id,),
-            )
-            row = await cursor.fetchone()
+            ) as cursor:
+                row = await cursor.fetchone()
             if row is None:
                 return None
             row_dict = dict(row)
-            key_points = json.loads(row_dict.get("key_points_json") or "[]")
-            actions = json.loads(row_dict.get("actions_json") or "[]")
+            key_points = orjson.loads(row_dict.get("key_points_json") or "[]")
+            actions = orjson.loads(row_dict.get("actions_json") or "[]")
             image_summaries_raw = row_dict.get("image_summaries_json")
-            image_summaries = json.loads(image_summaries_raw) if image_summaries_raw else []
+            image_summaries = orjson.loads(image_summaries_raw) if image_summaries_raw else []
             return SummaryResult(
                 model=row["model"],
                 prompt_version=row["prompt_version"],
@@ -341,7 +525,7 @@ class Storage:
             )
 
     async def save_score(self, post_id: int, score: ScoreResult) -> None:
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
             await conn.execute(
@@ -351,71 +535,76 @@ class Storage:
                     post_id,
                     float(score.score_total),
                     score.decision,
-                    json.dumps(score.explain, ensure_ascii=False),
+                    _dumps(score.explain),
                     now,
                 ),
             )
             await conn.execute(
-                "UPDATE posts SET status=?, updated_at=? WHERE id=?",
-                (STATUS_SCORED, now, post_id),
+                "UPDATE posts SET status=?, updated_at=? WHERE id=? AND status != ?",
+                (STATUS_SCORED, now, post_id, STATUS_SCORED),
             )
-            await conn.commit()
+            # A labeled post being re-scored (e.g. after reset_post) changes the labeled-scores join.
+            async with conn.execute("SELECT 1 FROM labels WHERE post_id=?", (post_id,)) as cursor:
+                labeled = await cursor.fetchone() is not None
+            await self._commit()
+            if labeled:
+                self.labels_version += 1
 
     async def load_score(self, post_id: int) -> ScoreResult | None:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
+        async with self._reader() as conn:
+            async with conn.execute(
                 "SELECT * FROM scores WHERE post_id=?",
                 (post_id,),
-            )
-            row = await cursor.fetchone()
+            ) as cursor:
+                row = await cursor.fetchone()
             if row is None:
                 return None
             return ScoreResult(
                 score_total=float(row["score_total"]),
                 decision=row["decision"],
-                explain=json.loads(row["explain_json"]),
+                explain=orjson.loads(row["explain_json"]),
             )
 
     async def record_delivery(self, post_id: int, target_chat_id: int, message_id: int) -> None:
-        async with self._lock:
+        await self.record_deliveries(post_id, [(target_chat_id, message_id)])
+
+    async def record_deliveries(self, post_id: int, targets: list[tuple[int, int]]) -> None:
+        """Record (target_chat_id, message_id) deliveries of one post with a single status update."""
+        if not targets:
+            return
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
-            await conn.execute(
+            await conn.executemany(
                 "INSERT OR IGNORE INTO deliveries(post_id, target_chat_id, message_id, delivered_at) VALUES(?, ?, ?, ?)",
-                (post_id, target_chat_id, message_id, now),
+                [(post_id, target_chat_id, message_id, now) for target_chat_id, message_id in targets],
             )
+            self._delivered.update((post_id, target_chat_id) for target_chat_id, _ in targets)
             await conn.execute(
                 "UPDATE posts SET status=?, updated_at=? WHERE id=?",
                 (STATUS_NOTIFIED, now, post_id),
             )
-            await conn.commit()
+            await self._commit()
 
     async def has_delivery(self, post_id: int, target_chat_id: int) -> bool:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute(
-                "SELECT 1 FROM deliveries WHERE post_id=? AND target_chat_id=?",
-                (post_id, target_chat_id),
-            )
-            return (await cursor.fetchone()) is not None
+        return (post_id, target_chat_id) in self._delivered
 
     async def update_fingerprint_processed(self, url_hash: str, decision: str) -> None:
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
             await conn.execute(
                 "UPDATE fingerprints SET last_processed_at=?, last_decision=? WHERE url_hash=?",
                 (now, decision, url_hash),
             )
-            await conn.commit()
+            await self._commit()
 
     async def upsert_label(self, post_id: int, label: str, labeled_by: int | None = None) -> None:
         label = (label or "").strip().lower()
         if label not in {_LABEL_USEFUL, _LABEL_USELESS}:
             raise ValueError(f"invalid label: {label}")
 
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
             try:
@@ -424,42 +613,44 @@ class Storage:
                     "ON CONFLICT(post_id) DO UPDATE SET label=excluded.label, labeled_by=excluded.labeled_by, labeled_at=excluded.labeled_at",
                     (post_id, label, labeled_by, now),
                 )
-                await conn.commit()
+                await self._commit()
+                self.labels_version += 1
             except aiosqlite.IntegrityError as e:
                 # Likely FK failure because the post no longer exists (old TG message button).
                 logger.warning("upsert_label integrity error post_id=%s err=%s", post_id, e)
                 raise
 
     async def count_labels(self) -> int:
-        async with self._lock:
-            conn = self._conn()
-            cursor = await conn.execute("SELECT COUNT(1) AS n FROM labels")
-            row = await cursor.fetchone()
+        async with self._reader() as conn:
+            async with conn.execute("SELECT COUNT(1) AS n FROM labels") as cursor:
+                row = await cursor.fetchone()
             return int(row["n"] if row is not None else 0)
 
-    async def get_labeled_scores(self, limit: int | None = None) -> list[tuple[float, int]]:
-        """Return list of (score_total, y) where y=1 for useful else 0."""
-        async with self._lock:
-            conn = self._conn()
+    async def get_labeled_scores(self, limit: int | None = None) -> tuple[array, array]:
+        """Return (scores, y) as parallel arrays sorted by score descending; y=1 for useful else 0.
+
+        `limit` keeps the earliest labels, as before.
+        """
+        async with self._reader() as conn:
             sql = (
-                "SELECT s.score_total AS score_total, l.label AS label "
+                "SELECT s.score_total AS score_total, "
+                "CASE WHEN l.label = ? THEN 1 ELSE 0 END AS y, l.labeled_at AS labeled_at "
                 "FROM labels l JOIN scores s ON s.post_id=l.post_id "
                 "ORDER BY l.labeled_at ASC"
             )
-            args: tuple = ()
+            args: tuple = (_LABEL_USEFUL,)
             if limit is not None:
                 sql += " LIMIT ?"
-                args = (int(limit),)
-            cursor = await conn.execute(sql, args)
-            rows = await cursor.fetchall()
+                args = (_LABEL_USEFUL, int(limit))
+            async with conn.execute(
+                f"SELECT score_total, y FROM ({sql}) ORDER BY score_total DESC, labeled_at ASC",
+                args,
+            ) as cursor:
+                rows = await cursor.fetchall()
 
-        out: list[tuple[float, int]] = []
-        for r in rows or []:
-            sc = float(r["score_total"])
-            lab = str(r["label"] or "").strip().lower()
-            y = 1 if lab == _LABEL_USEFUL else 0
-            out.append((sc, y))
-        return out
+        scores = array("d", (float(r[0]) for r in rows))
+        labels = array("b", (int(r[1]) for r in rows))
+        return scores, labels
 
     async def reset_post(self, post_id: int) -> None:
         """Reset a post for reprocessing.
@@ -468,11 +659,12 @@ class Storage:
         - Clears fetch attempts, content, AI summary, score.
         - Sets status back to NEW and confidence back to RSS_ONLY.
         """
-        async with self._lock:
+        async with self._guard():
             conn = self._conn()
             now = now_utc().isoformat()
 
             await conn.execute("DELETE FROM deliveries WHERE post_id=?", (post_id,))
+            self._delivered = {k for k in self._delivered if k[0] != post_id}
             await conn.execute("DELETE FROM fetch_attempts WHERE post_id=?", (post_id,))
             await conn.execute("DELETE FROM contents WHERE post_id=?", (post_id,))
             await conn.execute("DELETE FROM ai_summaries WHERE post_id=?", (post_id,))
@@ -482,35 +674,58 @@ class Storage:
                 "UPDATE posts SET status=?, source_confidence=?, updated_at=? WHERE id=?",
                 (STATUS_NEW, CONF_RSS_ONLY, now, post_id),
             )
-            await conn.commit()
+            await self._commit()
+            self.labels_version += 1
 
     async def cleanup(self, data_retention_days: int, fingerprint_retention_days: int) -> None:
-        async with self._lock:
-            conn = self._conn()
-            now = now_utc()
-            content_cutoff = (now - timedelta(days=data_retention_days)).isoformat()
-            fp_cutoff = (now - timedelta(days=fingerprint_retention_days)).isoformat()
+        now = now_utc()
+        content_cutoff = (now - timedelta(days=data_retention_days)).isoformat()
+        fp_cutoff = (now - timedelta(days=fingerprint_retention_days)).isoformat()
+
+        # Drop old content bodies and old fetch attempts
+        await self._in_chunks(
+            "UPDATE contents SET content_text=NULL",
+            "contents",
+            "fetched_at < ? AND content_text IS NOT NULL",
+            (content_cutoff,),
+        )
+        await self._in_chunks("DELETE FROM fetch_attempts", "fetch_attempts", "created_at < ?", (content_cutoff,))
 
-            # Drop old content bodies and old fetch attempts
-            await conn.execute("UPDATE contents SET content_text=NULL WHERE fetched_at < ?", (content_cutoff,))
-            await conn.execute("DELETE FROM fetch_attempts WHERE created_at < ?", (content_cutoff,))
+        # Summaries/scores are small, keep them for retention window only
+        await self._in_chunks("DELETE FROM ai_summaries", "ai_summaries", "created_at < ?", (content_cutoff,))
+        await self._in_chunks("DELETE FROM scores", "scores", "created_at < ?", (content_cutoff,))
 
-            # Summaries/scores are small, keep them for retention window only
-            await conn.execute("DELETE FROM ai_summaries WHERE created_at < ?", (content_cutoff,))
-            await conn.execute("DELETE FROM scores WHERE created_at < ?", (content_cutoff,))
+        # Deliveries are small; keep for retention window
+        await self._in_chunks("DELETE FROM deliveries", "deliveries", "delivered_at < ?", (content_cutoff,))
 
-            # Deliveries are small; keep for retention window
-            await conn.execute("DELETE FROM deliveries WHERE delivered_at < ?", (content_cutoff,))
+        # Remove old post rows (keep fingerprints for long-term dedup)
+        terminal = tuple(sorted(_TERMINAL_STATUSES))
+        placeholders = ",".join(["?"] * len(terminal))
+        await self._in_chunks(
+            "DELETE FROM posts", "posts", f"updated_at < ? AND status IN ({placeholders})", (content_cutoff, *terminal)
+        )
 
-            # Remove old post rows (keep fingerprints for long-term dedup)
-            terminal = tuple(sorted(_TERMINAL_STATUSES))
-            placeholders = ",".join(["?"] * len(terminal))
-            await conn.execute(
-                f"DELETE FROM posts WHERE updated_at < ? AND status IN ({placeholders})",
-                (content_cutoff, *terminal),
-            )
+        # Fingerprints can be long-lived
+        await self._in_chunks("DELETE FROM fingerprints", "fingerprints", "last_seen_at < ?", (fp_cutoff,))
+
+        async with self._guard():
+            await self._load_deliveries()
+            self.labels_version += 1
+            # Fold the freed pages' WAL frames back now rather than at the next write.
+            async with self._conn().execute("PRAGMA wal_checkpoint(PASSIVE)"):
+                pass
 
-            # Fingerprints can be long-lived
-            await conn.execute("DELETE FROM fingerprints WHERE last_seen_at < ?", (fp_cutoff,))
+    async def _in_chunks(self, head: str, table: str, where: str, args: tuple) -> None:
+        """Run `head` over the rows of `table` matching `where`, _CLEANUP_CHUNK rows per commit.
 
-            await conn.commit()
+        The lock is released between chunks, so other writes (and commits readers wait on) interleave.
+        """
+        sql = f"{head} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT {_CLEANUP_CHUNK})"
+        while True:
+            async with self._guard():
+                cursor = await self._conn().execute(sql, args)
+                n = cursor.rowcount
+                await self._commit()
+            if n < _CLEANUP_CHUNK:
+                return
+            await asyncio.sleep(0)
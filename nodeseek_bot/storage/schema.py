@@ -22,6 +22,8 @@ CREATE TABLE IF NOT EXISTS posts (
 CREATE UNIQUE INDEX IF NOT EXISTS ux_posts_guid ON posts(guid) WHERE guid IS NOT NULL;
 CREATE UNIQUE INDEX IF NOT EXISTS ux_posts_url_hash ON posts(url_hash);
 CREATE INDEX IF NOT EXISTS ix_posts_status_updated_at ON posts(status, updated_at);
+-- Only the actionable rows, for take_next_for_processing; status makes it covering.
+CREATE INDEX IF NOT EXISTS ix_posts_pending ON posts(updated_at, status) WHERE status IN ('NEW', 'FAILED');
 
 CREATE TABLE IF NOT EXISTS contents (
   post_id INTEGER PRIMARY KEY,
@@ -96,7 +98,9 @@ CREATE TABLE IF NOT EXISTS labels (
 );
 
 CREATE UNIQUE INDEX IF NOT EXISTS ux_labels_post_id ON labels(post_id);
-CREATE INDEX IF NOT EXISTS ix_labels_labeled_at ON labels(labeled_at);
+-- Covers get_labeled_scores' labeled_at-ordered scan; replaces ix_labels_labeled_at.
+DROP INDEX IF EXISTS ix_labels_labeled_at;
+CREATE INDEX IF NOT EXISTS ix_labels_labeled_at_post ON labels(labeled_at, post_id, label);
 CREATE INDEX IF NOT EXISTS ix_labels_label ON labels(label);
 
 CREATE TABLE IF NOT EXISTS fingerprints (
@@ -13,7 +13,7 @@ class FeedItem:
     summary: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PostRow:
     id: int
     guid: str | None
@@ -28,6 +28,14 @@ class PostRow:
     updated_at: str
 
 
+@dataclass(frozen=True, slots=True)
+class PostHeader:
+    id: int
+    status: str
+    url_hash: str
+    updated_at: str
+
+
 @dataclass(frozen=True)
 class FetchAttempt:
     method: str
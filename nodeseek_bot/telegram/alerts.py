@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 
 from telegram.ext import Application
 
@@ -8,6 +10,13 @@ from telegram.ext import Application
 logger = logging.getLogger(__name__)
 
 
+# A failure counter that resets and climbs back to its threshold re-alerts at most this often.
+_ALERT_SUPPRESS_SECONDS = 300.0
+_ALERT_SEND_TIMEOUT_SECONDS = 5.0
+# (name, threshold) -> monotonic time of the last alert sent
+_last_alert: dict[tuple[str, int], float] = {}
+
+
 async def maybe_send_consecutive_failure_alert(
     application: Application,
     alert_chat_id: int,
@@ -21,8 +30,24 @@ async def maybe_send_consecutive_failure_alert(
         # only alert on the edge to avoid spamming
         return
 
+    key = (name, threshold)
+    now = time.monotonic()
+    last = _last_alert.get(key)
+    if last is not None and now - last < _ALERT_SUPPRESS_SECONDS:
+        return
+    # Claimed before the await, so concurrent callers don't both send.
+    _last_alert[key] = now
+
     text = f"告警：{name} 连续失败达到 {count} 次（阈值 {threshold}）。已自动降级/退避，请检查日志与 Cookie/AI 服务。"
+    await send_alert(application, alert_chat_id, text)
+
+
+async def send_alert(application: Application, alert_chat_id: int, text: str) -> None:
+    """Send `text` to the alert chat; failures are logged, never raised."""
     try:
-        await application.bot.send_message(chat_id=alert_chat_id, text=text)
+        await asyncio.wait_for(
+            application.bot.send_message(chat_id=alert_chat_id, text=text),
+            timeout=_ALERT_SEND_TIMEOUT_SECONDS,
+        )
     except Exception:
         logger.exception("failed to send alert")
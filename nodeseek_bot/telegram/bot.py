@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
+from functools import lru_cache, wraps
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import Application, CallbackQueryHandler, CommandHandler, ContextTypes
 
-from nodeseek_bot.rules.loader import load_yaml, save_overrides
-
 
 logger = logging.getLogger(__name__)
 
 
+_LABELS = frozenset({"useful", "useless"})
+
+
 def _get_ctx(application: Application):
     ctx = application.bot_data.get("ctx")
     if ctx is None:
@@ -24,11 +27,21 @@ def _is_admin(update: Update, admin_user_id: int) -> bool:
     return u is not None and u.id == admin_user_id
 
 
-async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
+def _admin_only(fn):
+    """Command handler wrapper: ignore non-admin senders and pass the app context as a third argument."""
 
+    @wraps(fn)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        ctx = _get_ctx(context.application)
+        if not _is_admin(update, ctx.config.admin_user_id):
+            return
+        await fn(update, context, ctx)
+
+    return wrapper
+
+
+@_admin_only
+async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     stats = ctx.runtime_stats
     next_html = ctx.html_limiter.next_allowed_in_seconds()
 
@@ -43,37 +56,30 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     await update.message.reply_text(text)
 
 
-async def cmd_pause(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
+@_admin_only
+async def cmd_pause(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     ctx.paused = True
     ctx.runtime_stats.paused = True
     await update.message.reply_text("已暂停")
 
 
-async def cmd_resume(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
+@_admin_only
+async def cmd_resume(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     ctx.paused = False
     ctx.runtime_stats.paused = False
     await update.message.reply_text("已恢复")
 
 
-async def cmd_rules_reload(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
+@_admin_only
+async def cmd_rules_reload(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
+    # Pending command edits go to disk first, so the reload includes them.
+    await ctx.flush_overrides()
     await ctx.reload_rules()
     await update.message.reply_text("规则已重载")
 
 
-async def cmd_set_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
-
+@_admin_only
+async def cmd_set_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     if not context.args:
         await update.message.reply_text("用法：/set_threshold <n>")
         return
@@ -84,18 +90,13 @@ async def cmd_set_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("阈值必须是数字")
         return
 
-    data = load_yaml(ctx.config.rules_overrides_path)
-    data.setdefault("version", 1)
-    data["score_threshold"] = val
-    save_overrides(ctx.config.rules_overrides_path, data)
-    await ctx.reload_rules()
+    ctx.edit_overrides()["score_threshold"] = val
+    ctx.schedule_overrides_flush()
     await update.message.reply_text(f"阈值已更新为 {val}")
 
 
-async def cmd_whitelist_add(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
+@_admin_only
+async def cmd_whitelist_add(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     if not context.args:
         await update.message.reply_text("用法：/whitelist_add <kw>")
         return
@@ -103,20 +104,13 @@ async def cmd_whitelist_add(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not kw:
         return
 
-    data = load_yaml(ctx.config.rules_overrides_path)
-    data.setdefault("version", 1)
-    data.setdefault("keywords", {}).setdefault("whitelist", [])
-    if kw not in data["keywords"]["whitelist"]:
-        data["keywords"]["whitelist"].append(kw)
-    save_overrides(ctx.config.rules_overrides_path, data)
-    await ctx.reload_rules()
+    ctx.append_override("keywords", "whitelist", item=kw)
+    ctx.schedule_overrides_flush()
     await update.message.reply_text(f"已加入白名单：{kw}")
 
 
-async def cmd_blacklist_add(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
+@_admin_only
+async def cmd_blacklist_add(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     if not context.args:
         await update.message.reply_text("用法：/blacklist_add <kw>")
         return
@@ -124,21 +118,13 @@ async def cmd_blacklist_add(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not kw:
         return
 
-    data = load_yaml(ctx.config.rules_overrides_path)
-    data.setdefault("version", 1)
-    data.setdefault("keywords", {}).setdefault("blacklist", [])
-    if kw not in data["keywords"]["blacklist"]:
-        data["keywords"]["blacklist"].append(kw)
-    save_overrides(ctx.config.rules_overrides_path, data)
-    await ctx.reload_rules()
+    ctx.append_override("keywords", "blacklist", item=kw)
+    ctx.schedule_overrides_flush()
     await update.message.reply_text(f"已加入黑名单：{kw}")
 
 
-async def cmd_last(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
-
+@_admin_only
+async def cmd_last(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     limit = 10
     if context.args:
         try:
@@ -146,25 +132,20 @@ async def cmd_last(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         except ValueError:
             pass
 
-    rows = await ctx.storage.list_recent_posts(limit=limit)
+    rows = await ctx.storage.list_recent_posts_with_scores(limit=limit)
     if not rows:
         await update.message.reply_text("暂无记录")
         return
 
-    lines = []
-    for r in rows:
-        s = await ctx.storage.load_score(r.id)
-        score_text = f"{s.score_total:.1f} {s.decision}" if s else "(no score)"
-        lines.append(f"#{r.id} {score_text} {r.title} {r.url}")
-
-    await update.message.reply_text("\n".join(lines[:limit]))
-
+    text = "\n".join(
+        f"#{r.id} {f'{score_total:.1f} {decision}' if decision is not None else '(no score)'} {r.title} {r.url}"
+        for r, score_total, decision in rows
+    )
+    await update.message.reply_text(text)
 
-async def cmd_reprocess(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        return
 
+@_admin_only
+async def cmd_reprocess(update: Update, context: ContextTypes.DEFAULT_TYPE, ctx) -> None:
     if not context.args:
         await update.message.reply_text("用法：/reprocess <post_id>")
         return
@@ -178,7 +159,9 @@ async def cmd_reprocess(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     await update.message.reply_text("已重置并加入队列" if ok else "post_id 不存在")
 
 
-async def _build_keyboard_for_post(post_id: int, *, label: str | None = None, block_title_done: bool = False) -> InlineKeyboardMarkup:
+# Markups are immutable, so repeat clicks on the same post can share one.
+@lru_cache(maxsize=1024)
+def build_inline_keyboard(post_id: int, *, label: str | None = None, block_title_done: bool = False) -> InlineKeyboardMarkup:
     useful_text = "有用✅" if label == "useful" else "有用"
     useless_text = "没用✅" if label == "useless" else "没用"
 
@@ -196,103 +179,117 @@ async def _build_keyboard_for_post(post_id: int, *, label: str | None = None, bl
     )
 
 
-async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    query = update.callback_query
-    if query is None:
+async def _on_block_title(application: Application, ctx, query, post_id: int, label: str | None) -> None:
+    post = await ctx.storage.get_post(post_id)
+    if post is None:
+        await query.answer("帖子不存在", show_alert=True)
         return
 
-    ctx = _get_ctx(context.application)
-    if not _is_admin(update, ctx.config.admin_user_id):
-        await query.answer("无权限", show_alert=True)
+    # Ack now; the overrides edit runs after, and the button change confirms it.
+    await query.answer("处理中…")
+    application.create_task(_block_title(ctx, query, post_id, post.title))
+
+
+async def _block_title(ctx, query, post_id: int, title: str) -> None:
+    try:
+        pat = r"^" + re.escape(title) + r"$"
+        ctx.append_override("block_title_regex", item=pat)
+        ctx.schedule_overrides_flush()
+    except Exception:
+        logger.exception("block_title failed post_id=%s", post_id)
         return
 
-    data = query.data or ""
+    # Update button to reflect immediate effect (InlineKeyboardButton is immutable).
+    try:
+        await query.edit_message_reply_markup(
+            reply_markup=build_inline_keyboard(post_id, block_title_done=True)
+        )
+    except Exception:
+        logger.exception("failed to update block_title button")
+
+
+async def _answer_and_edit(query, text: str, markup: InlineKeyboardMarkup, *, show_alert: bool, what: str) -> None:
+    # Independent Bot API calls: the click waits for one round trip instead of two.
+    answered, edited = await asyncio.gather(
+        query.answer(text, show_alert=show_alert),
+        query.edit_message_reply_markup(reply_markup=markup),
+        return_exceptions=True,
+    )
+    if isinstance(edited, Exception):
+        logger.error("failed to %s", what, exc_info=edited)
+    if isinstance(answered, BaseException):
+        raise answered
+
+
+async def _on_label(application: Application, ctx, query, post_id: int, label: str | None) -> None:
+    if await ctx.storage.get_post_header(post_id) is None:
+        # Disable old buttons to avoid repeated failures.
+        await _answer_and_edit(
+            query,
+            "帖子已过期/不存在",
+            InlineKeyboardMarkup([[InlineKeyboardButton("已过期", callback_data="noop")]]),
+            show_alert=True,
+            what="disable expired keyboard",
+        )
+        return
 
-    m = re.match(r"^block_title:(?P<post_id>\d+)$", data)
-    if m:
-        post_id = int(m.group("post_id"))
-        action = "block_title"
-    else:
-        m2 = re.match(r"^label:(useful|useless):(?P<post_id>\d+)$", data)
-        if not m2:
-            if data == "noop":
-                await query.answer("已生效", show_alert=False)
-                return
-            await query.answer("未知操作", show_alert=True)
-            return
-        post_id = int(m2.group("post_id"))
-        action = f"label_{m2.group(1)}"
+    try:
+        await ctx.save_label(post_id, label)
+    except Exception as e:
+        logger.warning("save_label failed post_id=%s err=%s", post_id, e)
+        await query.answer("记录失败：帖子不存在或 DB 已更新", show_alert=True)
+        return
 
-    if action == "block_title":
-        post = await ctx.storage.get_post(post_id)
-        if post is None:
-            await query.answer("帖子不存在", show_alert=True)
-            return
+    # Update buttons by rebuilding keyboard.
+    await _answer_and_edit(
+        query, "已记录", build_inline_keyboard(post_id, label=label), show_alert=False, what="update label buttons"
+    )
 
-        pat = r"^" + re.escape(post.title) + r"$"
-        ovr = load_yaml(ctx.config.rules_overrides_path)
-        ovr.setdefault("version", 1)
-        ovr.setdefault("block_title_regex", [])
-        if pat not in ovr["block_title_regex"]:
-            ovr["block_title_regex"].append(pat)
-        save_overrides(ctx.config.rules_overrides_path, ovr)
-        await ctx.reload_rules()
-        await query.answer("已加入标题黑名单")
-
-        # Update button to reflect immediate effect (InlineKeyboardButton is immutable).
-        try:
-            await query.edit_message_reply_markup(
-                reply_markup=await _build_keyboard_for_post(post_id, label=None, block_title_done=True)
-            )
-        except Exception:
-            logger.exception("failed to update block_title button")
 
-        return
+_CALLBACK_ACTIONS = {
+    "block_title": _on_block_title,
+    "label": _on_label,
+}
 
-    if action in {"label_useful", "label_useless"}:
-        label = "useful" if action == "label_useful" else "useless"
-
-        post = await ctx.storage.get_post(post_id)
-        if post is None:
-            await query.answer("帖子已过期/不存在", show_alert=True)
-            try:
-                # Disable old buttons to avoid repeated failures.
-                await query.edit_message_reply_markup(
-                    reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("已过期", callback_data="noop")]])
-                )
-            except Exception:
-                logger.exception("failed to disable expired keyboard")
-            return
 
-        try:
-            await ctx.save_label(post_id, label)
-        except Exception as e:
-            logger.warning("save_label failed post_id=%s err=%s", post_id, e)
-            await query.answer("记录失败：帖子不存在或 DB 已更新", show_alert=True)
-            return
+def _parse_callback(data: str) -> tuple[str, int, str | None] | None:
+    """Split "block_title:<post_id>" / "label:(useful|useless):<post_id>" into (action, post_id, label)."""
+    action, sep, rest = data.partition(":")
+    if not sep or action not in _CALLBACK_ACTIONS:
+        return None
+    label = None
+    if action == "label":
+        label, sep, rest = rest.partition(":")
+        if not sep or label not in _LABELS:
+            return None
+    # isdecimal, not isdigit: the latter admits superscripts that int() rejects.
+    if not rest.isdecimal():
+        return None
+    return action, int(rest), label
 
-        await query.answer("已记录", show_alert=False)
 
-        # Update buttons by rebuilding keyboard.
-        try:
-            await query.edit_message_reply_markup(reply_markup=await _build_keyboard_for_post(post_id, label=label))
-        except Exception:
-            logger.exception("failed to update label buttons")
+async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    if query is None:
+        return
 
+    ctx = _get_ctx(context.application)
+    if not _is_admin(update, ctx.config.admin_user_id):
+        await query.answer("无权限", show_alert=True)
         return
 
+    data = query.data or ""
+    if data == "noop":
+        await query.answer("已生效", show_alert=False)
+        return
 
-def build_inline_keyboard(post_id: int) -> InlineKeyboardMarkup:
-    # keep it sync with _build_keyboard_for_post
-    return InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton("有用", callback_data=f"label:useful:{post_id}"),
-                InlineKeyboardButton("没用", callback_data=f"label:useless:{post_id}"),
-            ],
-            [InlineKeyboardButton("加入黑名单(标题)", callback_data=f"block_title:{post_id}")],
-        ]
-    )
+    parsed = _parse_callback(data)
+    if parsed is None:
+        await query.answer("未知操作", show_alert=True)
+        return
+
+    action, post_id, label = parsed
+    await _CALLBACK_ACTIONS[action](context.application, ctx, query, post_id, label)
 
 
 async def _on_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -3,11 +3,6 @@ from __future__ import annotations
 import html
 
 from nodeseek_bot.storage.types import PostRow, ScoreResult, SummaryResult
-from nodeseek_bot.utils import truncate
-
-
-def _escape_text(s: str) -> str:
-    return html.escape(s or "")
 
 
 def _escape_url_raw(url: str) -> str:
@@ -15,28 +10,28 @@ def _escape_url_raw(url: str) -> str:
 
     Use HTML entities so the displayed text remains the original URL.
     """
-    return html.escape(url or "", quote=False)
+    if not url:
+        return ""
+    # quote=False only touches these three; most post URLs contain none of them.
+    if "&" not in url and "<" not in url and ">" not in url:
+        return url
+    return html.escape(url, quote=False)
 
 
 def render_message(post: PostRow, summary: SummaryResult | None, score: ScoreResult, max_chars: int = 3800) -> str:
-    title = _escape_text(post.title)
-    url_raw = _escape_url_raw(post.url)
-
-    lines: list[str] = [f"<b>{title}</b>", f"打开原帖：{url_raw}"]
-
-    if summary is not None and summary.summary_text:
-        lines.append("<b>摘要</b>")
-        lines.append(_escape_text(summary.summary_text))
-
-    if summary is not None and summary.key_points:
-        lines.append("<b>要点</b>")
-        for p in summary.key_points[:6]:
-            lines.append(f"- {_escape_text(p)}")
-
-    if summary is not None and summary.image_summaries:
-        lines.append("<b>图片识别</b>")
-        for p in summary.image_summaries[:10]:
-            lines.append(f"- {_escape_text(p)}")
+    esc = html.escape
+    lines: list[str] = [f"<b>{esc(post.title or '')}</b>", f"打开原帖：{_escape_url_raw(post.url)}"]
+
+    if summary is not None:
+        if summary.summary_text:
+            lines += ("<b>摘要</b>", esc(summary.summary_text))
+        if summary.key_points:
+            lines.append("<b>要点</b>")
+            lines.extend([f"- {esc(p or '')}" for p in summary.key_points[:6]])
+        if summary.image_summaries:
+            lines.append("<b>图片识别</b>")
+            lines.extend([f"- {esc(p or '')}" for p in summary.image_summaries[:10]])
 
     text = "\n".join(lines)
-    return truncate(text, max_chars)
+    # Inlined utils.truncate: nearly every message fits, so this is one length check.
+    return text if len(text) <= max_chars else text[: max_chars - 1] + "…"
@@ -2,12 +2,24 @@ from __future__ import annotations
 
 import hashlib
 import re
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 from datetime import datetime, timezone
 
 
 _UTM_PREFIXES = ("utm_",)
 
+# Already canonical: lowercase http(s) scheme, a host, and nothing urlparse would strip or reject.
+_PLAIN_URL_RE = re.compile(r"https?://[^/?#;\[\]\t\r\n][^?#;\[\]\t\r\n]*\Z")
+
+# k=v pairs of unreserved characters only: parse_qsl + urlencode would reproduce them verbatim.
+_PLAIN_QUERY_RE = re.compile(r"[A-Za-z0-9._~-]+=[A-Za-z0-9._~-]*(?:&[A-Za-z0-9._~-]+=[A-Za-z0-9._~-]*)*\Z")
+
+_HSPACE_RE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+# Short fragments (text nodes, cells, titles) repeat a lot; long bodies are not worth caching.
+_COLLAPSE_CACHE_MAX_LEN = 256
+
 
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -17,21 +29,47 @@ def sha256_hex(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
 
 
+# Feed polls keep revisiting the same links; the result depends only on the string.
+@lru_cache(maxsize=4096)
 def canonicalize_url(url: str) -> str:
     url = url.strip()
+    if _PLAIN_URL_RE.match(url):
+        # No query or fragment to clean; the parse/unparse round trip would return it unchanged.
+        return url
     parsed = urlparse(url)
-    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not k.startswith(_UTM_PREFIXES)]
-    cleaned = parsed._replace(fragment="", query=urlencode(query))
+    query = parsed.query
+    if _PLAIN_QUERY_RE.match(query):
+        query = "&".join(p for p in query.split("&") if not p.startswith(_UTM_PREFIXES))
+    elif query:
+        query = urlencode([(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if not k.startswith(_UTM_PREFIXES)])
+    cleaned = parsed._replace(fragment="", query=query)
     return urlunparse(cleaned)
 
 
-def collapse_ws(text: str) -> str:
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"[ \t\f\v]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+def _collapse_ws(text: str) -> str:
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _HSPACE_RE.sub(" ", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
     return text.strip()
 
 
+_collapse_ws_short = lru_cache(maxsize=4096)(_collapse_ws)
+
+
+def collapse_ws(text: str) -> str:
+    if not text:
+        return ""
+    if len(text) < _COLLAPSE_CACHE_MAX_LEN:
+        return _collapse_ws_short(text)
+    return _collapse_ws(text)
+
+
+def collapse_ws_inline(text: str) -> str:
+    """Collapse every whitespace run (newlines included) to one space, for single-line fields."""
+    return " ".join(text.split()) if text else ""
+
+
 def truncate(text: str, max_chars: int) -> str:
     if len(text) <= max_chars:
         return text